@@ -342,6 +342,37 @@ class Plan:
         else:
             raise UserWarning(f"Cannot add type: {type(p)} to plan.")
 
+    def extend(self, components: list) -> None:
+        """Safely add an ordered batch of components to the plan.
+
+        The act-leg-act sequence is validated in one pass across the batch,
+        then the components are appended with a single list extend.
+
+        Args:
+          components (list): components to add, in order.
+
+        """
+        previous = self.day[-1] if self.day else None
+        for c in components:
+            if isinstance(c, Activity):
+                if previous is not None and isinstance(previous, Activity):
+                    raise PAMSequenceValidationError(
+                        "Failed to add to plan, next component must be a Trip or Leg."
+                    )
+            elif isinstance(c, Leg) or isinstance(c, Trip):
+                if previous is None:
+                    raise PAMSequenceValidationError(
+                        "Failed to add to plan, first component must be Activity instance."
+                    )
+                if not isinstance(previous, Activity):
+                    raise PAMSequenceValidationError(
+                        "Failed to add to plan, next component must be Activity instance."
+                    )
+            else:
+                raise UserWarning(f"Cannot add type: {type(c)} to plan.")
+            previous = c
+        self.day.extend(components)
+
     # validation methods
 
     @property
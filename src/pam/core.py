@@ -1275,6 +1275,14 @@ class Person:
         """
         self.plan.add(p)
 
+    def extend(self, components: list) -> None:
+        """Safely add an ordered batch of components to the plan.
+
+        Args:
+            components (list): components to add, in order.
+        """
+        self.plan.extend(components)
+
     def finalise(self):
         """Add activity end times based on start time of next activity."""
         self.plan.finalise_activity_end_times()
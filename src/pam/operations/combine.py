@@ -1,3 +1,8 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
 from pam import core, read
 
 
@@ -11,6 +16,7 @@ def pop_combine(
     leg_attributes: bool = True,
     leg_route: bool = True,
     keep_non_selected=True,
+    max_workers: Optional[int] = None,
 ):
     """Combine two or more populations (e.g. household, freight... etc)."""
     print("==================================================")
@@ -18,21 +24,32 @@ def pop_combine(
 
     combined_population = core.Population()
 
-    for inpath in inpaths:
-        population = read.read_matsim(
-            inpath,
-            weight=1,
-            version=matsim_version,
-            household_key=household_key,
-            simplify_pt_trips=simplify_pt_trips,
-            autocomplete=autocomplete,
-            crop=crop,
-            leg_attributes=leg_attributes,
-            leg_route=leg_route,
-            keep_non_selected=keep_non_selected,
-        )
-        print(f"population: {population.stats}")
-
-        combined_population += population
+    read_population = partial(
+        read.read_matsim,
+        weight=1,
+        version=matsim_version,
+        household_key=household_key,
+        simplify_pt_trips=simplify_pt_trips,
+        autocomplete=autocomplete,
+        crop=crop,
+        leg_attributes=leg_attributes,
+        leg_route=leg_route,
+        keep_non_selected=keep_non_selected,
+    )
+
+    if max_workers is None:
+        max_workers = min(8, os.cpu_count() or 1)
+
+    # read concurrently; lxml parsing releases the GIL so threads overlap
+    # parse CPU with disk I/O, while the merge reduces on the main thread.
+    # merge in submission order: __iadd__ is order-sensitive, so the result
+    # must not depend on which read happens to finish first
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(read_population, inpath) for inpath in inpaths]
+        for future in futures:
+            population = future.result()
+            print(f"population: {population.stats}")
+
+            combined_population += population
 
     return combined_population
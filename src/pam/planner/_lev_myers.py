@@ -0,0 +1,110 @@
+"""Bit-parallel Myers Levenshtein kernel.
+
+Numba-compiled alternative backend for `pam.planner.clustering.calc_levenshtein_matrix`.
+Each pattern is packed into one 64-bit mask per alphabet symbol, so the inner
+dynamic-programming loop collapses to a handful of uint64 operations per text
+character. This restricts the kernel to sequences of at most 64 characters;
+longer sequences should use the rapidfuzz backend instead.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit, prange
+
+MAX_SEQUENCE_LENGTH = 64
+
+
+def _pack_sequences(sequences: list[str], alphabet: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Pack sequences into per-symbol uint64 bitmasks and integer code arrays.
+
+    Args:
+        sequences (list[str]): Sequences to pack, each at most 64 characters.
+        alphabet (dict): Mapping of characters to consecutive integer codes.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (masks, codes) where masks[i, c] has bit j set
+            when sequences[i][j] == c, and codes[i, :len] holds the symbol codes.
+    """
+    n = len(sequences)
+    max_len = max((len(seq) for seq in sequences), default=0)
+    masks = np.zeros((n, len(alphabet)), dtype=np.uint64)
+    codes = np.zeros((n, max(max_len, 1)), dtype=np.int64)
+    for i, seq in enumerate(sequences):
+        for j, char in enumerate(seq):
+            code = alphabet[char]
+            masks[i, code] |= np.uint64(1) << np.uint64(j)
+            codes[i, j] = code
+    return masks, codes
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _cdist_kernel(x_masks, x_lengths, y_codes, y_lengths, out, symmetric):  # pragma: no cover
+    one = np.uint64(1)
+    for i in prange(x_lengths.size):
+        m = x_lengths[i]
+        high_bit = one << np.uint64(m - 1) if m > 0 else one
+        # when x and y hold the same sequences only the upper triangle is
+        # computed; each cell is mirrored as it is written
+        start = i if symmetric else 0
+        for j in range(start, y_lengths.size):
+            t = y_lengths[j]
+            if m == 0 or t == 0:
+                distance = m + t
+            else:
+                pv = ~np.uint64(0)
+                mv = np.uint64(0)
+                distance = m
+                for k in range(t):
+                    eq = x_masks[i, y_codes[j, k]]
+                    xv = eq | mv
+                    xh = (((eq & pv) + pv) ^ pv) | eq
+                    ph = mv | ~(xh | pv)
+                    mh = pv & xh
+                    if ph & high_bit:
+                        distance += 1
+                    elif mh & high_bit:
+                        distance -= 1
+                    ph = (ph << one) | one
+                    mh = mh << one
+                    pv = mh | ~(xv | ph)
+                    mv = ph & xv
+            denominator = max(m, t)
+            if denominator == 0:
+                value = 0.0
+            else:
+                value = distance / denominator
+            out[i, j] = value
+            if symmetric:
+                out[j, i] = value
+
+
+def cdist_myers(x: list[str], y: list[str], symmetric: bool = False) -> np.ndarray:
+    """Normalised Levenshtein distance matrix via the bit-parallel Myers algorithm.
+
+    Args:
+        x (list[str]): Sequences for the matrix rows.
+        y (list[str]): Sequences for the matrix columns.
+        symmetric (bool): Whether x and y hold the same sequences, in which case
+            only the upper triangle is computed and mirrored. Defaults to False.
+
+    Returns:
+        np.ndarray: A float32 matrix of normalised distances.
+
+    Raises:
+        ValueError: If any sequence exceeds 64 characters.
+    """
+    if any(len(seq) > MAX_SEQUENCE_LENGTH for seq in x) or any(
+        len(seq) > MAX_SEQUENCE_LENGTH for seq in y
+    ):
+        raise ValueError(
+            f"The Myers kernel only supports sequences of up to {MAX_SEQUENCE_LENGTH} characters."
+        )
+    alphabet = {char: code for code, char in enumerate(sorted(set("".join(x) + "".join(y))))}
+    x_masks, _ = _pack_sequences(x, alphabet)
+    _, y_codes = _pack_sequences(y, alphabet)
+    x_lengths = np.array([len(seq) for seq in x], dtype=np.int64)
+    y_lengths = np.array([len(seq) for seq in y], dtype=np.int64)
+    out = np.empty((len(x), len(y)), dtype=np.float32)
+    _cdist_kernel(x_masks, x_lengths, y_codes, y_lengths, out, symmetric and x == y)
+    return out
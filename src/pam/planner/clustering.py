@@ -1,39 +1,145 @@
 from __future__ import annotations
 
+import functools
 import itertools
-from functools import lru_cache, partial
-from multiprocessing import Pool
+from types import SimpleNamespace
 from typing import TYPE_CHECKING, Literal, Optional
 
 if TYPE_CHECKING:
     from pam.core import Population
 
+import fastcluster
 import numpy as np
 import pandas as pd
-from Levenshtein import ratio
-from sklearn.cluster import AgglomerativeClustering, SpectralClustering
+from rapidfuzz.distance import Levenshtein
+from rapidfuzz.process import cdist
+from scipy.cluster import hierarchy
+from scipy.spatial.distance import squareform
+from sklearn.cluster import KMeans, SpectralClustering
 
 from pam.activity import Plan
-from pam.planner.encoder import PlansCharacterEncoder
+from pam.planner.encoder import PlansCharacterEncoder, PlansOneHotEncoder
 from pam.plot.plans import plot_activity_breakdown_area, plot_activity_breakdown_area_tiles
 
+try:  # pragma: no cover
+    # optional SIMD-accelerated kernel for per-pair distances
+    from stringzilla import edit_distance as _sz_edit_distance
 
-def _levenshtein_distance(a: str, b: str) -> float:
-    """Levenstein distance between two strings."""
-    return 1 - ratio(a, b)
+    def _levenshtein_distance_uncached(a: str, b: str, max_dist: Optional[float] = None) -> float:
+        n = max(len(a), len(b))
+        if n == 0:
+            return 0.0
+        if max_dist is not None:
+            # band the alignment; past the ceiling report 1,
+            # matching rapidfuzz's score_cutoff contract
+            bound = int(max_dist * n) + 1
+            distance = _sz_edit_distance(a, b, bound=bound) / n
+            return distance if distance <= max_dist else 1.0
+        return _sz_edit_distance(a, b) / n
 
+except ImportError:
 
-def calc_levenshtein_matrix(x: list[str], y: list[str], n_cores=1) -> np.array:
-    """Create a levenshtein distance matrix from two lists of strings."""
-    levenshtein_distance = np.vectorize(_levenshtein_distance)
-    if n_cores == 1:
-        distances = levenshtein_distance(np.array(x).reshape(-1, 1), np.array(y))
-    else:
-        xs = np.array_split(x, n_cores)
-        xs = [x.reshape(-1, 1) for x in xs]
-        calc_levenshtein_matrix_partial = partial(levenshtein_distance, b=y)
-        with Pool(n_cores) as p:
-            distances = np.concatenate(p.map(calc_levenshtein_matrix_partial, xs))
+    def _levenshtein_distance_uncached(a: str, b: str, max_dist: Optional[float] = None) -> float:
+        if max_dist is not None:
+            # rapidfuzz prunes to a diagonal band and returns 1 past the cutoff
+            return Levenshtein.normalized_distance(a, b, score_cutoff=max_dist)
+        return Levenshtein.normalized_distance(a, b)
+
+
+@functools.lru_cache(maxsize=65536)
+def _levenshtein_distance_cached(a: str, b: str) -> float:
+    return _levenshtein_distance_uncached(a, b)
+
+
+def _levenshtein_distance(a: str, b: str, max_dist: Optional[float] = None) -> float:
+    """Levenstein distance between two strings.
+
+    Args:
+        a (str): First sequence.
+        b (str): Second sequence.
+        max_dist (Optional[float]): Normalised distance ceiling. When given,
+            the alignment is pruned to a diagonal band and any distance above
+            the ceiling is clamped, which is much cheaper for near matches.
+            Defaults to None.
+    """
+    # duplicate encodings are common (identical daily patterns), so memoise;
+    # the metric is symmetric, so order the pair for a canonical cache key
+    if b < a:
+        a, b = b, a
+    if max_dist is not None:
+        return _levenshtein_distance_uncached(a, b, max_dist)
+    return _levenshtein_distance_cached(a, b)
+
+
+def _calc_levenshtein_matrix_cudf(x: list[str], y: list[str]) -> np.array:  # pragma: no cover
+    """Pairwise normalised Levenshtein distances computed on GPU with cudf's nvtext kernel.
+
+    Requires the optional RAPIDS cudf/cupy dependencies and a CUDA device.
+    """
+    import cudf
+    import cupy as cp
+
+    series = cudf.Series(x)
+    len_x = cp.asarray([len(seq) for seq in x])
+    columns = []
+    for target in y:
+        raw = series.str.edit_distance(target).values
+        denominator = cp.maximum(len_x, len(target))
+        denominator = cp.where(denominator == 0, 1, denominator)
+        columns.append(raw / denominator)
+    distances = cp.stack(columns, axis=1).astype(cp.float32)
+
+    # downstream consumers (fastcluster, sklearn) operate on host memory
+    return cp.asnumpy(distances)
+
+
+def calc_levenshtein_matrix(
+    x: list[str],
+    y: list[str],
+    n_cores=1,
+    symmetric: bool = False,
+    backend: Literal["rapidfuzz", "myers", "cudf"] = "rapidfuzz",
+    score_cutoff: Optional[float] = None,
+) -> np.array:
+    """Create a levenshtein distance matrix from two lists of strings.
+
+    Distances are normalised to [0, 1] and stored as float32,
+        halving the memory footprint of the matrix with no loss that matters to clustering.
+
+    Args:
+        x (list[str]): Encoded plan sequences (matrix rows).
+        y (list[str]): Encoded plan sequences (matrix columns).
+        n_cores (int): Number of worker threads. Defaults to 1.
+        symmetric (bool): Whether x and y hold the same sequences,
+            in which case only the upper triangle is computed and mirrored. Defaults to False.
+        backend (Literal['rapidfuzz', 'myers', 'cudf']): The distance kernel to use.
+            The numba-compiled "myers" backend only supports sequences of up to 64 characters,
+            beyond which it falls back to rapidfuzz.
+            The "cudf" backend offloads to GPU and requires the optional RAPIDS libraries.
+            Defaults to "rapidfuzz".
+        score_cutoff (Optional[float]): Distances above this value are clamped to 1.
+            Lets rapidfuzz discard pairs from cheap lower bounds (such as the length
+            difference) before running the full alignment. Defaults to None.
+    """
+    if symmetric:
+        y = x
+    if backend == "cudf":
+        return _calc_levenshtein_matrix_cudf(x, y)
+    if backend == "myers":
+        if max((len(seq) for seq in itertools.chain(x, y)), default=0) <= 64:
+            from pam.planner._lev_myers import cdist_myers
+
+            return cdist_myers(x, y, symmetric=symmetric)
+    # cache blocking and thread granularity are delegated to rapidfuzz,
+    # which tiles the matrix internally and releases the GIL across workers
+    distances = cdist(
+        x,
+        y,
+        scorer=Levenshtein.normalized_distance,
+        workers=n_cores,
+        dtype=np.float32,
+        score_cutoff=score_cutoff,
+    )
 
     return distances
 
@@ -44,36 +150,135 @@ class PlanClusters:
         of character-encoded plan sequences.
     """
 
-    def __init__(self, population: Population, n_cores: int = 1) -> None:
+    def __init__(
+        self,
+        population: Population,
+        n_cores: int = 1,
+        mmap_path: Optional[str] = None,
+        embedding: Literal["levenshtein", "histogram"] = "levenshtein",
+    ) -> None:
+        """
+        Args:
+            population (Population): The population whose plans are clustered.
+            n_cores (int): Number of workers for the distance computation. Defaults to 1.
+            mmap_path (Optional[str]): When set, the condensed distance matrix is stored
+                in a memory-mapped file at this path, keeping resident memory bounded
+                for populations whose distance matrix does not fit in RAM. Defaults to None.
+            embedding (Literal['levenshtein', 'histogram']): Plan similarity measure.
+                The default "levenshtein" clusters on pairwise edit distances of the
+                encoded sequences; "histogram" embeds each plan as its vector of
+                minutes per activity class and fits KMeans on it, trading sequence
+                sensitivity for O(N) fitting on large populations. Defaults to "levenshtein".
+        """
+        if embedding not in ("levenshtein", "histogram"):
+            raise ValueError("Please select a valid embedding ('levenshtein' or 'histogram')")
         self.population = population
+        self.mmap_path = mmap_path
+        self.embedding = embedding
+        self._embedding_matrix = None
+        self._onehot_encoder = None
         self.plans = list(population.plans())
+        self._plan_idx = {id(plan): idx for idx, plan in enumerate(self.plans)}
+        self._plans_array = np.empty(len(self.plans), dtype=object)
+        self._plans_array[:] = self.plans
         self.n_cores = n_cores
+        self._enc_cache: dict[int, str] = {}
         self._distances = None
+        self._distances_condensed = None
+        self._distances_no_diag = None
+        self._cluster_plans = None
         self.model = None
 
         # encodings
-        self.activity_classes = sorted(list(population.activity_classes) + ["travel"])
+        # memoise the sorted classes on the population,
+        # as the activity_classes property walks every plan on each access
+        activity_classes = getattr(population, "_sorted_activity_classes", None)
+        if activity_classes is None:
+            activity_classes = sorted(population.activity_classes | {"travel"})
+            population._sorted_activity_classes = activity_classes
+        self.activity_classes = activity_classes
         self.plans_encoder = PlansCharacterEncoder(activity_classes=self.activity_classes)
 
     @property
-    @lru_cache()
     def plans_encoded(self) -> list[str]:
-        return self.plans_encoder.encode(self.plans)
+        missing = [plan for plan in self.plans if id(plan) not in self._enc_cache]
+        if missing:
+            for plan, encoded in zip(missing, self.plans_encoder.encode(missing)):
+                self._enc_cache[id(plan)] = encoded
+        return [self._enc_cache[id(plan)] for plan in self.plans]
+
+    @property
+    def embedding_matrix(self) -> np.array:
+        """Fixed-length embedding of every plan: minutes spent per activity class."""
+        if self._embedding_matrix is None:
+            encoder = self.plans_encoder.plan_encoder.activity_encoder
+            symbols = [encoder.encode(label) for label in self.activity_classes]
+            encoded = self.plans_encoded
+            matrix = np.empty((len(encoded), len(symbols)))
+            for i, sequence in enumerate(encoded):
+                for j, symbol in enumerate(symbols):
+                    matrix[i, j] = sequence.count(symbol)
+            self._embedding_matrix = matrix
+        return self._embedding_matrix
+
+    @property
+    def distances_condensed(self) -> np.array:
+        """Levenshtein distances between activity plans,
+        in condensed (upper-triangle) form of length N(N-1)/2."""
+        if self._distances_condensed is None:
+            # many plans share an encoding, so only compute distances
+            # between unique sequences and scatter back with the inverse index
+            unique, inverse = np.unique(np.array(self.plans_encoded), return_inverse=True)
+            dist_unique = calc_levenshtein_matrix(
+                list(unique), list(unique), n_cores=self.n_cores, symmetric=True
+            )
+            n = inverse.size
+            if self.mmap_path is None:
+                rows, cols = np.triu_indices(n, k=1)
+                self._distances_condensed = dist_unique[inverse[rows], inverse[cols]]
+            else:
+                # spill the condensed matrix to disk, filling it one row-block
+                # at a time so resident memory stays O(N)
+                condensed = np.memmap(
+                    self.mmap_path, dtype=np.float32, mode="w+", shape=(n * (n - 1) // 2,)
+                )
+                start = 0
+                for i in range(n - 1):
+                    stop = start + (n - i - 1)
+                    condensed[start:stop] = dist_unique[inverse[i], inverse[i + 1 :]]
+                    start = stop
+                self._distances_condensed = condensed
+        return self._distances_condensed
 
     @property
     def distances(self) -> np.array:
-        """Levenshtein distances between activity plans."""
+        """Levenshtein distances between activity plans, as a square matrix."""
         if self._distances is None:
-            self._distances = calc_levenshtein_matrix(
-                self.plans_encoded, self.plans_encoded, n_cores=self.n_cores
-            )
+            self._distances = squareform(self.distances_condensed)
         return self._distances
 
+    def _condensed_row(self, idx: int) -> np.array:
+        """Extract one row of the distance matrix from its condensed form,
+        with the diagonal entry masked to inf."""
+        n = len(self.plans)
+        condensed = self.distances_condensed
+        row = np.empty(n, dtype=condensed.dtype)
+        i = np.arange(idx)
+        row[:idx] = condensed[i * n - i * (i + 1) // 2 + (idx - i - 1)]
+        j = np.arange(idx + 1, n)
+        row[idx + 1 :] = condensed[idx * n - idx * (idx + 1) // 2 + (j - idx - 1)]
+        row[idx] = np.inf
+        return row
+
     @property
     def distances_no_diagonal(self) -> np.array:
-        dist = self.distances.copy()
-        np.fill_diagonal(dist, 1)
-        return dist
+        if self._distances_no_diag is None:
+            # expand the condensed form in C rather than copying the square matrix,
+            # and use inf (not 1, a valid distance) as the diagonal sentinel
+            dist = squareform(self.distances_condensed)
+            np.fill_diagonal(dist, np.inf)
+            self._distances_no_diag = dist
+        return self._distances_no_diag
 
     def fit(
         self,
@@ -83,17 +288,25 @@ class PlanClusters:
     ) -> None:
         """Fit an agglomerative clustering model.
 
+        Agglomerative clustering uses fastcluster's nearest-neighbour-chain
+            implementation, which agglomerates a precomputed distance matrix in O(N^2).
+
         Args:
           n_clusters (int): The number of clusters to use.
-          clustering_method (Literal['agglomerative', 'spectral']): The clustering method to use. Defaults to "agglomerative".
+          clustering_method (Literal['agglomerative', 'spectral']): The clustering method to use.
+            Ignored for the "histogram" embedding, which always fits KMeans. Defaults to "agglomerative".
           linkage (str, optional): Linkage criterion. Defaults to "complete".
 
         """
-        if clustering_method == "agglomerative":
-            model = AgglomerativeClustering(
-                n_clusters=n_clusters, linkage=linkage, metric="precomputed"
-            )
-            model.fit((self.distances))
+        if self.embedding == "histogram":
+            # fixed-length embedding: KMeans rides BLAS matrix products,
+            # avoiding the O(N^2) pairwise distance matrix altogether
+            model = KMeans(n_clusters=n_clusters, n_init=1, algorithm="elkan")
+            model.fit(self.embedding_matrix)
+        elif clustering_method == "agglomerative":
+            linkage_matrix = fastcluster.linkage(self.distances_condensed, method=linkage)
+            labels = hierarchy.fcluster(linkage_matrix, t=n_clusters, criterion="maxclust") - 1
+            model = SimpleNamespace(labels_=labels, linkage_matrix_=linkage_matrix)
         elif clustering_method == "spectral":
             model = SpectralClustering(n_clusters=n_clusters, affinity="precomputed")
             model.fit((1 - self.distances))
@@ -103,12 +316,50 @@ class PlanClusters:
             )
 
         self.model = model
+        self._cluster_plans = None
+
+    def _cluster_to_plans(self) -> dict:
+        """Map every cluster label to its plans with a single stable sort of the labels."""
+        if self._cluster_plans is None:
+            labels = np.asarray(self.model.labels_)
+            order = np.argsort(labels, kind="stable")
+            boundaries = np.where(np.diff(labels[order]))[0] + 1
+            groups = np.split(order, boundaries)
+            self._cluster_plans = {
+                int(labels[group[0]]): self._plans_array[group].tolist() for group in groups
+            }
+        return self._cluster_plans
 
     def get_closest_matches(self, plan, n) -> list[Plan]:
         """Get the n closest matches of a PAM activity schedule."""
-        idx = self.plans.index(plan)
-        idx_closest = np.argsort(self.distances_no_diagonal[idx])[:n]
-        return [self.plans[x] for x in idx_closest]
+        idx = self._plan_idx.get(id(plan))
+        if idx is None:
+            # plan object not held by this instance, fall back to equality scan
+            try:
+                idx = self.plans.index(plan)
+            except ValueError:
+                idx = None
+        if idx is not None and self._distances_condensed is not None:
+            row = self._condensed_row(idx)
+        else:
+            # a single query does not justify materialising the full N^2
+            # matrix: encode the query once and compute one row against
+            # the cached encodings
+            encoded = self.plans_encoded
+            if idx is not None:
+                query = encoded[idx]
+            else:
+                query = self.plans_encoder.plan_encoder.encode(plan)
+            row = calc_levenshtein_matrix([query], encoded, n_cores=self.n_cores)[0]
+            if idx is not None:
+                row[idx] = np.inf
+        # O(N) selection of the n best, then sort only those
+        if n < row.size:
+            idx_closest = np.argpartition(row, n)[:n]
+            idx_closest = idx_closest[np.argsort(row[idx_closest])]
+        else:
+            idx_closest = np.argsort(row)
+        return list(self._plans_array[idx_closest])
 
     def get_cluster_plans(self, cluster: int) -> list:
         """Get the plans that belong in a specific cluster.
@@ -116,11 +367,14 @@ class PlanClusters:
         Args:
             cluster (int): The cluster index.
         """
-        return list(itertools.compress(self.plans, self.model.labels_ == cluster))
+        return self._cluster_to_plans().get(cluster, [])
 
     def get_cluster_sizes(self) -> pd.Series:
         """Get the number of plans in each cluster."""
-        return pd.Series(self.model.labels_).value_counts()
+        counts = np.bincount(np.asarray(self.model.labels_))
+        sizes = pd.Series(counts, index=np.arange(counts.size))
+        # match value_counts semantics: drop empty clusters, largest first
+        return sizes[sizes > 0].sort_values(ascending=False, kind="stable")
 
     def get_cluster_membership(self) -> dict:
         """Get the cluster membership of each person in the population.
@@ -130,6 +384,13 @@ class PlanClusters:
         ids = [(hid, pid) for hid, pid, person in self.population.people()]
         return dict(zip(ids, self.model.labels_))
 
+    @property
+    def _breakdown_encoder(self) -> PlansOneHotEncoder:
+        """One-hot encoder shared by the breakdown plots, built on first use."""
+        if self._onehot_encoder is None:
+            self._onehot_encoder = PlansOneHotEncoder(activity_classes=self.activity_classes)
+        return self._onehot_encoder
+
     def plot_plan_breakdowns(
         self, ax=None, cluster=None, activity_classes: Optional[list[str]] = None, **kwargs
     ):
@@ -141,11 +402,12 @@ class PlanClusters:
         else:
             plans = self.plans
 
-        if activity_classes is None:
-            activity_classes = self.activity_classes
-
+        if activity_classes is not None:
+            return plot_activity_breakdown_area(
+                plans=plans, activity_classes=activity_classes, ax=ax, **kwargs
+            )
         return plot_activity_breakdown_area(
-            plans=plans, activity_classes=self.activity_classes, ax=ax, **kwargs
+            plans=plans, plans_encoder=self._breakdown_encoder, ax=ax, **kwargs
         )
 
     def plot_plan_breakdowns_tiles(self, n: Optional[int] = None, **kwargs):
@@ -156,8 +418,9 @@ class PlanClusters:
             n = len(set(self.model.labels_))
 
         clusters = self.get_cluster_sizes().head(n).index
-        plans = {cluster: self.get_cluster_plans(cluster) for cluster in clusters}
+        cluster_plans = self._cluster_to_plans()
+        plans = {cluster: cluster_plans[cluster] for cluster in clusters}
 
         return plot_activity_breakdown_area_tiles(
-            plans=plans, activity_classes=self.activity_classes, **kwargs
+            plans=plans, plans_encoder=self._breakdown_encoder, **kwargs
         )
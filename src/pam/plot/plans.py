@@ -467,10 +467,21 @@ def plot_activity_breakdown_area(
 
 
 def plot_activity_breakdown_area_tiles(
-    plans: dict[list[Plan]], activity_classes: list[str], figsize=(10, 8), **kwargs
+    plans: dict[list[Plan]],
+    activity_classes: Optional[list[str]] = None,
+    plans_encoder: Optional[type[encoder.PlanEncoder]] = None,
+    figsize=(10, 8),
+    **kwargs,
 ):
-    """Tiled area plot of the breakdown of activities taking place every minute."""
-    plans_encoder = encoder.PlansOneHotEncoder(activity_classes=activity_classes)
+    """Tiled area plot of the breakdown of activities taking place every minute.
+
+    One of `activity_classes` or `plans_encoder` must be provided;
+    passing an encoder lets repeat callers reuse it across plots.
+    """
+    if activity_classes is not None:
+        plans_encoder = encoder.PlansOneHotEncoder(activity_classes=activity_classes)
+    elif plans_encoder is None:
+        raise ValueError("Please provide a list of activity classes or a plans encoder.")
     labels = plans_encoder.plan_encoder.activity_encoder.labels
     nrows = int(np.ceil(len(plans) / 2))
     irow = 0
@@ -3,7 +3,7 @@ import os
 import pickle
 import random
 from collections.abc import Generator, Iterator
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 import geopandas as gp
 import numpy as np
@@ -127,6 +127,34 @@ class FacilitySampler:
 
         return loc
 
+    def get_sampler(self, location_idx: str, activity: str) -> Optional[Callable]:
+        """Return a zero-argument callable bound to the sampler for the given zone and activity.
+
+        Callers drawing repeatedly from the same (zone, activity) pair can cache the
+        callable and skip the per-call dictionary resolution in sample_facility.
+        Returns None when the pair needs the full fallback logic in sample_facility
+        (missing zone or activity, or a mode-dependent weighted sampler).
+
+        Args:
+            location_idx (str): the zone to sample from
+            activity (str): activity purpose
+
+        Returns:
+            Optional[Callable]: callable returning a sampled point, or None.
+        """
+        sampler = self.samplers.get(location_idx, {}).get(activity)
+        if not isinstance(sampler, Generator):
+            return None
+
+        def draw() -> shapely.geometry.Point:
+            idx, loc = next(sampler)
+            self.error_counter = 0
+            if idx is not None and self.build_xml:
+                self.facilities[idx] = {"loc": loc, "act": activity}
+            return loc
+
+        return draw
+
     def sample_facility(
         self,
         location_idx: str,
@@ -1,12 +1,20 @@
+from __future__ import annotations
+
 import random
 import warnings
-from typing import Any, Dict, Iterable, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Union
 
 import geopandas as gp
 import networkx as nx
 import numpy as np
 import pandas as pd
-from matplotlib import pyplot as plt
+import shapely
+from numba import njit
+
+if TYPE_CHECKING:
+    # pyplot is imported lazily inside the plotting methods,
+    # so importing this module does not pay matplotlib's startup cost
+    from matplotlib import pyplot as plt
 from scipy.spatial import distance_matrix
 from shapely.geometry import Point
 
@@ -15,6 +23,17 @@ from pam.samplers.facility import FacilitySampler
 from pam.utils import minutes_to_datetime as mtdt
 from pam.variables import END_OF_DAY, EXPECTED_EUCLIDEAN_SPEEDS
 
+# minutes-of-day to datetime conversions are bounded and hot when building
+# tours, so precompute them once rather than constructing a datetime per call
+_MTDT_CACHE = tuple(mtdt(minute) for minute in range(1500))
+
+
+def _fast_mtdt(minute: int):
+    """Cached minutes_to_datetime for the typical 0..1500 minute range."""
+    if 0 <= minute < 1500:
+        return _MTDT_CACHE[minute]
+    return mtdt(minute)
+
 
 def create_density_gdf(
     facility_zone: gp.GeoDataFrame,
@@ -33,36 +52,31 @@ def create_density_gdf(
     Returns:
         gp.GeoDataFrame: measure of density of activities in each zone
     """
+    # filter before grouping so the groupby only hashes relevant rows,
+    # and count with the narrow size kernel rather than a frame-wide agg
+    filtered = facility_zone[facility_zone["activity"].isin(activity)]
+
+    # densities are computed on the raw count and level arrays in single
+    # NumPy passes; the grouped levels are only surfaced as columns at the end
     if normalise is not None:
-        density = (
-            facility_zone.groupby([facility_zone.index, "activity", normalise])
-            .agg({"id": "count"})
-            .reset_index()
-        )
-        density.set_index(facility_zone.index.name, inplace=True)
-        density = density[density["activity"].isin(activity)]
-        density["density"] = density["id"] / density[normalise]
-        total_density = density[~(density[normalise] == 0)]["density"].sum()
-        density["density"] = density["density"] / total_density
+        counts = filtered.groupby([filtered.index, "activity", normalise])["id"].size()
+        norm_values = counts.index.get_level_values(normalise).to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            values = counts.to_numpy(dtype=np.float64) / norm_values
+        values = values / values[norm_values != 0].sum()
+        density = counts.rename("id").reset_index(level=["activity", normalise])
     else:
-        density = (
-            facility_zone.groupby([facility_zone.index, "activity"])
-            .agg({"id": "count"})
-            .reset_index()
-        )
-        density.set_index(facility_zone.index.name, inplace=True)
-        density = density[density["activity"].isin(activity)]
-        density["density"] = density["id"] / density["id"].sum()
-
-    # Convert back to geodataframe for merging.
-    density = pd.merge(
-        density, zone["geometry"], left_on=density.index, right_on=zone.index, how="left"
-    )
-    density.rename(columns={"key_0": facility_zone.index.name}, inplace=True)
+        counts = filtered.groupby([filtered.index, "activity"])["id"].size()
+        values = counts.to_numpy(dtype=np.float64)
+        values = values / values.sum()
+        density = counts.rename("id").reset_index(level="activity")
+    density["density"] = values
+
+    # Convert back to geodataframe, aligning geometries on the shared zone index.
+    density["geometry"] = zone["geometry"].reindex(density.index).values
     density = gp.GeoDataFrame(data=density, geometry="geometry")
-    density.set_index(facility_zone.index.name, inplace=True)
 
-    if np.isinf(density["density"]).sum() >= 1:
+    if np.isinf(density["density"].to_numpy()).any():
         warnings.warn("Your density gdf has infinite values")
 
     return density
@@ -83,38 +97,35 @@ class PivotDistributionSampler:
             pivots (dict): a dictionary of values associated with the bins.
             total (optional): Defaults to None.
         """
-        self.demand = {}
-
         if bins[0] not in pivots:
             pivots[bins[0]] = 0
         if bins[-1] + 1 not in pivots:
             pivots[bins[-1] + 1] = 0
 
         pivot_keys = sorted(pivots.keys())
+        pivot_values = [pivots[k] for k in pivot_keys]
 
-        for k in range(len(pivot_keys) - 1):
-            ka = pivot_keys[k]
-            kb = pivot_keys[k + 1]
-            pivot_a = pivots[ka]
-            pivot_b = pivots[kb]
-            for i in bins:
-                if ka <= i < kb:
-                    self.demand[i] = self._interpolate(i, ka, pivot_a, kb, pivot_b)
-                else:
-                    continue
+        # one vectorized interpolation over all bins replaces the nested Python loops
+        demand = np.interp(list(bins), pivot_keys, pivot_values)
 
         if total is not None:
-            dist_sum = sum(self.demand.values())
-            for i in bins:
-                self.demand[i] = (self.demand[i] / dist_sum) * total
+            demand = demand * (total / float(demand.sum()))
 
-    @staticmethod
-    def _interpolate(i, ai, a, bi, b):
-        "input values to build distribution between values a and ai."
-        return a + (i - ai) * (b - a) / (bi - ai)
+        self.demand = dict(zip(bins, demand.tolist()))
+        self._frequency_sampler = None
+
+    @property
+    def _sampler(self) -> "FrequencySampler":
+        if self._frequency_sampler is None:
+            self._frequency_sampler = FrequencySampler(
+                list(self.demand.keys()), list(self.demand.values())
+            )
+        return self._frequency_sampler
 
     def plot(self, plot_title, x_label, y_label):
         """Plots distribution to validate the distribution aligns with expected hourly demand."""
+        from matplotlib import pyplot as plt
+
         fig, ax = plt.subplots(figsize=(10, 4))
         ax.bar(list(self.demand.keys()), list(self.demand.values()))
         ax.plot(list(self.demand.keys()), list(self.demand.values()), c="orange")
@@ -125,7 +136,7 @@ class PivotDistributionSampler:
         return fig
 
     def sample(self):
-        return random.choices(list(self.demand.keys()), list(self.demand.values()), k=1)[0]
+        return self._sampler.sample()
 
 
 class FrequencySampler:
@@ -158,6 +169,44 @@ class FrequencySampler:
         self.frequency = freq
         self.threshold_matrix = threshold_matrix
         self.threshold_value = threshold_value
+        self._keys = None
+        self._prob = None
+        self._alias = None
+        self._threshold_keys = None
+        self._threshold_prob = None
+        self._threshold_alias = None
+
+    @staticmethod
+    def _vose_tables(weights: np.ndarray) -> tuple:
+        """Build Vose alias tables for the given weights,
+        so each weighted draw costs O(1) instead of
+        random.choices rebuilding cumulative weights per call."""
+        n = weights.size
+        total = float(weights.sum())
+        if total <= 0:
+            raise ValueError("Total of weights must be greater than zero")
+        scaled = weights * (n / total)
+
+        prob = np.zeros(n, dtype=np.float64)
+        alias = np.zeros(n, dtype=np.int64)
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s = small.pop()
+            lg = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = lg
+            scaled[lg] -= 1 - scaled[s]
+            (small if scaled[lg] < 1 else large).append(lg)
+        for i in small + large:
+            prob[i] = 1
+
+        return prob, alias
+
+    def _build_alias(self) -> None:
+        self._keys = list(self.distribution)
+        weights = np.asarray(list(self.frequency), dtype=np.float64)
+        self._prob, self._alias = self._vose_tables(weights)
 
     def sample(self) -> Any:
         """
@@ -166,7 +215,14 @@ class FrequencySampler:
             Any: Single object sampled from distribution
 
         """
-        return random.choices(self.distribution, weights=self.frequency, k=1)[0]
+        if self.frequency is None:
+            return random.choice(self.distribution)
+        if self._keys is None:
+            self._build_alias()
+        i = random.randrange(len(self._keys))
+        if random.random() < self._prob[i]:
+            return self._keys[i]
+        return self._keys[self._alias[i]]
 
     def samples(self, n: int = 1) -> list:
         """
@@ -178,21 +234,44 @@ class FrequencySampler:
           list: objects sampled from distribution
 
         """
-        return random.choices(self.distribution, weights=self.frequency, k=n)
+        if self.frequency is None:
+            return random.choices(self.distribution, k=n)
+        if self._keys is None:
+            self._build_alias()
+        # draw from the stdlib random stream, as sample() does, so that
+        # random.seed() reproduces runs
+        chosen = []
+        n_keys = len(self._keys)
+        for _ in range(n):
+            i = random.randrange(n_keys)
+            if random.random() >= self._prob[i]:
+                i = self._alias[i]
+            chosen.append(self._keys[i])
+        return chosen
 
     def threshold_sample(self):
-        """Returns a sampler of a distribution that has been reduced based on a threshold value."""
-        d_list = self.threshold_matrix
-        d_list = d_list[d_list <= self.threshold_value].index
-        d_threshold = self.distribution[self.distribution.index.isin(d_list)]
+        """Returns a sampler of a distribution that has been reduced based on a threshold value.
 
-        if len(d_threshold) == 0:
+        The reduced distribution and its alias tables are built on the first call
+        and reused, so repeated draws skip the index filtering entirely.
+        """
+        if self._threshold_keys is None:
+            d_list = self.threshold_matrix
+            d_list = d_list[d_list <= self.threshold_value].index
+            mask = np.isin(self.distribution.index.values, d_list.values)
+            d_threshold = self.distribution[mask]
+            self._threshold_keys = list(d_threshold.index)
+            if self._threshold_keys:
+                weights = np.asarray(d_threshold[self.frequency], dtype=np.float64)
+                self._threshold_prob, self._threshold_alias = self._vose_tables(weights)
+
+        if not self._threshold_keys:
             warnings.warn("No destinations within this threshold value, change threshold")
             return None
-        else:
-            return random.choices(
-                list(d_threshold.index), weights=list(d_threshold[self.frequency]), k=1
-            )[0]
+        i = random.randrange(len(self._threshold_keys))
+        if random.random() < self._threshold_prob[i]:
+            return self._threshold_keys[i]
+        return self._threshold_keys[self._threshold_alias[i]]
 
 
 def model_distance(o, d, scale=1.4):
@@ -200,6 +279,11 @@ def model_distance(o, d, scale=1.4):
     return o.distance(d) * scale
 
 
+def model_distances(o, destinations, scale=1.4) -> np.ndarray:
+    """Models distances between one shapely point and many others in a single vectorized GEOS call."""
+    return shapely.distance(o, np.asarray(destinations)) * scale
+
+
 def model_journey_time(
     distance: Union[float, int], speed: float = EXPECTED_EUCLIDEAN_SPEEDS["freight"]
 ) -> float:
@@ -231,6 +315,45 @@ def model_activity_time(time: int, maxi: int = 3600, mini: int = 600) -> int:
     return max([mini, min([time, maxi])])
 
 
+@njit(cache=True)
+def _compute_schedule(
+    dist_arr: np.ndarray, end_tm0: int, speed: float, maxi: float, mini: float
+) -> tuple:  # pragma: no cover
+    """Compute the full tour timeline from the leg distances in one compiled pass.
+
+    Args:
+        dist_arr (np.ndarray): Distance in metres of each leg, including the return to origin.
+        end_tm0 (int): End time (minutes) of the first activity, when the tour departs.
+        speed (float): Speed in metres/second.
+        maxi (float): Maximum stop duration in seconds.
+        mini (float): Minimum stop duration in seconds.
+
+    Returns:
+        tuple: (leg start times, leg end times, stop durations in seconds).
+    """
+    n_legs = dist_arr.shape[0]
+    leg_start = np.empty(n_legs, dtype=np.int64)
+    leg_end = np.empty(n_legs, dtype=np.int64)
+    stop_durations = np.empty(n_legs, dtype=np.float64)
+
+    end_tm = end_tm0
+    for k in range(n_legs):
+        leg_start[k] = end_tm
+        trip_duration = dist_arr[k] / speed
+        duration = trip_duration
+        if duration > maxi:
+            duration = maxi
+        if duration < mini:
+            duration = mini
+        stop_durations[k] = duration
+        end_tm = end_tm + int(trip_duration / 60)
+        leg_end[k] = end_tm
+        if k < n_legs - 1:
+            end_tm = end_tm + int(duration / 60)
+
+    return leg_start, leg_end, stop_durations
+
+
 class TourPlanner:
     """Object for agents to efficiently plan their tours by sequencing stops and adding activities and legs.
 
@@ -276,6 +399,41 @@ class TourPlanner:
         self.o_activity = activity_params["o_activity"]
         self.d_activity = activity_params["d_activity"]
 
+        # the destination distribution is static across stops, so cache its
+        # cumulative weights once and sample by binary search rather than
+        # rebuilding a FrequencySampler (and its cumulative list) per stop
+        self._d_index = np.asarray(d_dist.index)
+        self._d_cum = np.cumsum(np.asarray(d_dist[d_freq], dtype=np.float64))
+        self._threshold_cdfs: dict = {}
+        self._facility_samplers: dict = {}
+
+    def _threshold_cdf(self, o_zone: str) -> tuple:
+        """Cumulative destination weights reduced to zones within the threshold value,
+        cached per origin zone."""
+        cached = self._threshold_cdfs.get(o_zone)
+        if cached is None:
+            thresholds = self.threshold_matrix.loc[o_zone]
+            valid = thresholds[thresholds <= self.threshold_value].index
+            d_threshold = self.d_dist[self.d_dist.index.isin(valid)]
+            index = np.asarray(d_threshold.index)
+            cum = np.cumsum(np.asarray(d_threshold[self.d_freq], dtype=np.float64))
+            cached = (index, cum)
+            self._threshold_cdfs[o_zone] = cached
+        return cached
+
+    def _sample_facility(self, zone: str, activity: str) -> Point:
+        """Sample a facility location, memoising the per-(zone, activity) sampler callable
+        so repeated draws from the same zone skip the facility sampler's lookup work."""
+        key = (zone, activity)
+        sampler = self._facility_samplers.get(key)
+        if sampler is None:
+            sampler = self.facility_sampler.get_sampler(zone, activity)
+            if sampler is None:
+                # the pair needs the sampler's fallback logic; do not cache
+                return self.facility_sampler.sample(zone, activity)
+            self._facility_samplers[key] = sampler
+        return sampler()
+
     def d_zone_sample_choice(self) -> str:
         """Samples a destination zone (d_zone) as a string, dependent on the presence of a threshold matrix.
 
@@ -284,60 +442,77 @@ class TourPlanner:
 
         """ ""
         if self.threshold_matrix is None:
-            d_zone = FrequencySampler(self.d_dist.index, self.d_dist[self.d_freq]).sample()
+            index, cum = self._d_index, self._d_cum
+        else:
+            index, cum = self._threshold_cdf(self.o_zone)
+            if index.size == 0:
+                warnings.warn("No destinations within this threshold value, change threshold")
+                return None
+
+        return index[np.searchsorted(cum, random.random() * cum[-1], side="right")]
+
+    def _sample_d_zones(self, n: int) -> list:
+        """Draw n destination zones in a single vectorized pass over the cached CDF.
+
+        Args:
+            n (int): number of zones to draw.
+
+        Returns:
+            list: sampled destination zones.
+        """
+        if self.threshold_matrix is None:
+            index, cum = self._d_index, self._d_cum
         else:
-            d_zone = FrequencySampler(
-                dist=self.d_dist,
-                freq=self.d_freq,
-                threshold_matrix=self.threshold_matrix.loc[self.o_zone],
-                threshold_value=self.threshold_value,
-            ).threshold_sample()
+            index, cum = self._threshold_cdf(self.o_zone)
+            if index.size == 0:
+                warnings.warn("No destinations within this threshold value, change threshold")
+                return [None] * n
 
-        return d_zone
+        thresholds = np.random.random(n) * cum[-1]
+        return index[np.searchsorted(cum, thresholds, side="right")].tolist()
 
-    def sample_destinations(self, o_loc) -> List[Dict[str, Any]]:
+    def sample_destinations(self, o_loc) -> tuple[list, list, np.ndarray]:
         """Samples destinations and prevents repeated sampling of destinations, and prevents origin from be sampled as a destination
 
+        Destinations are held as parallel structures (zones, facilities, distances)
+        rather than a list of per-stop dictionaries.
+
         Args:
             o_loc (Point): shapely.geometry.Point representing the sampled origin location.
 
         Returns:
-            List[Dict[str, Any]]: A list of dictionaries containing information about each stop in the tour.
+            tuple[list, list, np.ndarray]: (d_zones, d_facilities, distances) for each stop in the tour.
         """
-        d_seq = []
-        sampled_d_facilities = []
+        d_zones = []
+        d_facilities = []
+
+        # If threshold matrix is none, sample random d_zones, else select d_zones within threshold value
+        d_zones_drawn = self._sample_d_zones(self.stops)
 
-        for stop in range(self.stops):
-            # If threshold matrix is none, sample a random d_zone, else select a d_zone within threshold value
-            d_zone = TourPlanner.d_zone_sample_choice(self)
+        for stop, d_zone in enumerate(d_zones_drawn):
             # once d_zone is selected, select a specific point location for d_activity
-            d_facility = self.facility_sampler.sample(d_zone, self.d_activity)
+            d_facility = self._sample_facility(d_zone, self.d_activity)
 
             # prevent the depot from being sampled as a delivery (destination) or duplicate sampling of delivery (destination) locations
-            while d_facility == o_loc or d_facility in sampled_d_facilities:
-                d_zone = TourPlanner.d_zone_sample_choice(self)
-                d_facility = self.facility_sampler.sample(d_zone, self.d_activity)
-
-            # append select d_facility to sampled list for tracking
-            sampled_d_facilities.append(d_facility)
-
-            # append to a dictionary to sequence destinations
-            d_seq.append(
-                {
-                    "stops": stop,
-                    "destination_zone": d_zone,
-                    "destination_facility": d_facility,
-                    "distance": model_distance(o_loc, d_facility),
-                }
-            )
-        return d_seq
+            while d_facility == o_loc or d_facility in d_facilities:
+                d_zone = self.d_zone_sample_choice()
+                d_facility = self._sample_facility(d_zone, self.d_activity)
+
+            d_zones.append(d_zone)
+            d_facilities.append(d_facility)
 
-    def create_distance_matrix(self, o_loc: Point, d_seq: list) -> np.ndarray:
+        # batch the origin-to-stop distances rather than crossing
+        # the GEOS boundary once per stop
+        distances = model_distances(o_loc, d_facilities)
+
+        return d_zones, d_facilities, distances
+
+    def create_distance_matrix(self, o_loc: Point, d_facilities: list) -> np.ndarray:
         """Create a distance matrix between the origin location and a list of destinations.
 
         Args:
             o_loc (Point): shapely.geometry.Point representing the sampled origin location.
-            d_seq (List[Dict[str, Any]]): A list of dictionaries containing information about each stop in the tour.
+            d_facilities (list): The sampled destination location of each stop in the tour.
 
         Returns:
             np.ndarray: 2D NumPy array representing the distance matrix between origin and destinations.
@@ -346,9 +521,7 @@ class TourPlanner:
         o_location = np.array([[o_loc.x, o_loc.y]])
 
         # extract d_facility
-        d_locations = np.array(
-            [[location.x, location.y] for location in [d["destination_facility"] for d in d_seq]]
-        )
+        d_locations = np.array([[location.x, location.y] for location in d_facilities])
 
         locs = np.concatenate([o_location, d_locations], 0)
         dist_matrix = distance_matrix(locs, locs)
@@ -369,21 +542,22 @@ class TourPlanner:
 
         return seq
 
-    def reorder_destinations(self, d_seq, seq) -> List[Dict[str, Any]]:
+    def reorder_destinations(self, d_zones: list, d_facilities: list, seq: List[int]) -> tuple:
         """Reorder the destinations based on the provided sequence.
 
         Args:
-            d_seq (List[Dict[str, Any]]): A list of dictionaries containing information about each stop (destination) in the tour.
+            d_zones (list): The sampled destination zone of each stop in the tour.
+            d_facilities (list): The sampled destination location of each stop in the tour.
             seq (List[int]): List of integers representing the optimised sequence of stops.
 
         Returns:
-            List[Dict[str, Any]]: A list of dictionaries representing the reordered stops (destinations)
+            tuple[list, list]: The reordered (d_zones, d_facilities).
         """
-        # use `seq` to re-order `d_locs` into an ordered list of dictionaries
+        # use `seq` to re-order the parallel destination lists
         # remove o_loc (first and last stop) from sequence & adjust sequence range
-        d_seq = [d_seq[order - 1] for order in seq[1:-1]]
+        order = [stop - 1 for stop in seq[1:-1]]
 
-        return d_seq
+        return [d_zones[i] for i in order], [d_facilities[i] for i in order]
 
     def sequence_stops(self) -> tuple[Point, list[Point], list[Point]]:
         """Creates a sequence for a number of stops. Sequence is determined by approximated greedy TSP
@@ -394,26 +568,22 @@ class TourPlanner:
         """
         o_loc = self.facility_sampler.sample(self.o_zone, self.o_activity)
 
-        d_seq = TourPlanner.sample_destinations(self, o_loc)
-        dist_matrix = TourPlanner.create_distance_matrix(self, o_loc, d_seq)
+        d_zones, d_facilities, _ = self.sample_destinations(o_loc)
+        dist_matrix = self.create_distance_matrix(o_loc, d_facilities)
 
-        seq = TourPlanner.approx_greedy_tsp(self, dist_matrix)
-
-        d_optimised_seq = TourPlanner.reorder_destinations(self, d_seq, seq)
+        seq = self.approx_greedy_tsp(dist_matrix)
 
         # sort distance: furthest facility to closest facility to origin facility. The final stop should be closest to origin.
-        d_zones = [item.get("destination_zone") for item in d_optimised_seq]
-        d_locs = [item.get("destination_facility") for item in d_optimised_seq]
+        d_zones, d_locs = self.reorder_destinations(d_zones, d_facilities, seq)
 
         return o_loc, d_zones, d_locs
 
-    def add_tour_activity(
-        self, agent: str, k: Iterable, zone: str, loc: Point, activity_type: str, time_params: dict
-    ) -> int:
-        """Add activity to tour plan. This will add an activity to the agent plan after each leg within the tour.
+    def _build_tour_activity(
+        self, k: Iterable, zone: str, loc: Point, activity_type: str, time_params: dict
+    ) -> tuple:
+        """Construct a tour Activity without adding it to a plan.
 
         Args:
-          agent (str): agent for which the activity will be added to Plan
           k (int): when used in a for loop, k populates the next sequence value
           zone (str): zone where activity takes place
           loc (shapely.Point): facility location where activity takes place
@@ -421,7 +591,7 @@ class TourPlanner:
           time_params (dict[str, str]): dictionary of time_params that may be time samplers or times of previous journeys
 
         Returns:
-          int: end_tm of activity.
+          tuple: (Activity, end_tm of activity).
 
         """
         if activity_type == self.o_activity:
@@ -443,23 +613,80 @@ class TourPlanner:
         # Activity plan requires mtdt format, but int format needs to passed for other functions to calculate new start time.
         # END_OF_DAY is already in mtdt format, adding an exception to keep set mtdt format when not END_OF_DAY.
         if end_tm is not END_OF_DAY:
-            end_tm_mtdt = mtdt(end_tm)
+            end_tm_mtdt = _fast_mtdt(end_tm)
         else:
             end_tm_mtdt = end_tm
 
-        agent.add(
-            Activity(
-                seq=seq,
-                act=act,
-                area=zone,
-                loc=loc,
-                start_time=mtdt(start_tm),
-                end_time=end_tm_mtdt,
-            )
+        activity = Activity(
+            seq=seq,
+            act=act,
+            area=zone,
+            loc=loc,
+            start_time=_fast_mtdt(start_tm),
+            end_time=end_tm_mtdt,
         )
 
+        return activity, end_tm
+
+    def add_tour_activity(
+        self, agent: str, k: Iterable, zone: str, loc: Point, activity_type: str, time_params: dict
+    ) -> int:
+        """Add activity to tour plan. This will add an activity to the agent plan after each leg within the tour.
+
+        Args:
+          agent (str): agent for which the activity will be added to Plan
+          k (int): when used in a for loop, k populates the next sequence value
+          zone (str): zone where activity takes place
+          loc (shapely.Point): facility location where activity takes place
+          activity_type (str): this function has specific logic for 'return_origin'
+          time_params (dict[str, str]): dictionary of time_params that may be time samplers or times of previous journeys
+
+        Returns:
+          int: end_tm of activity.
+
+        """
+        activity, end_tm = self._build_tour_activity(
+            k=k, zone=zone, loc=loc, activity_type=activity_type, time_params=time_params
+        )
+        agent.add(activity)
+
         return end_tm
 
+    def _build_tour_leg(
+        self,
+        k: Iterable,
+        o_zone: str,
+        o_loc: Point,
+        d_zone: str,
+        d_loc: Point,
+        start_tm: int,
+        end_tm: int,
+    ) -> Leg:
+        """Construct a tour Leg without adding it to a plan.
+
+        Args:
+          k (Iterable): when used in a for loop, k populates the next sequence value
+          o_zone (str): origin zone of leg
+          o_loc (shapely.point): origin facility of leg
+          d_zone (str): destination zone of leg
+          d_loc (shapely.point): destination facility of leg
+          start_tm (int): obtained from DurationEstimator object
+          end_tm (int): obtained from DurationEstimator object
+
+        Returns:
+          Leg: the constructed leg.
+        """
+        return Leg(
+            seq=k + 1,
+            mode="car",
+            start_area=o_zone,
+            end_area=d_zone,
+            start_loc=o_loc,
+            end_loc=d_loc,
+            start_time=_fast_mtdt(start_tm),
+            end_time=_fast_mtdt(end_tm),
+        )
+
     def add_tour_leg(
         self,
         agent: str,
@@ -486,15 +713,14 @@ class TourPlanner:
           int: new end_tm after leg is added to plan.
         """
         agent.add(
-            Leg(
-                seq=k + 1,
-                mode="car",
-                start_area=o_zone,
-                end_area=d_zone,
-                start_loc=o_loc,
-                end_loc=d_loc,
-                start_time=mtdt(start_tm),
-                end_time=mtdt(end_tm),
+            self._build_tour_leg(
+                k=k,
+                o_zone=o_zone,
+                o_loc=o_loc,
+                d_zone=d_zone,
+                d_loc=d_loc,
+                start_tm=start_tm,
+                end_tm=end_tm,
             )
         )
 
@@ -513,17 +739,28 @@ class TourPlanner:
           d_locs (list): destination facilities of leg & activity.
         """
 
+        # build all components first and add them to the plan in one batch,
+        # so sequence validation and append bookkeeping are amortised
+        components = []
+
         # add origin activity
         time_params = {"hour": self.hour, "minute": self.minute}
         # first activity
-        end_tm = self.add_tour_activity(
-            agent=agent,
-            k=1,
-            zone=self.o_zone,
-            loc=o_loc,
-            activity_type=self.o_activity,
-            time_params=time_params,
+        activity, end_tm = self._build_tour_activity(
+            k=1, zone=self.o_zone, loc=o_loc, activity_type=self.o_activity, time_params=time_params
         )
+        components.append(activity)
+        # compute the whole numeric schedule in one compiled pass,
+        # leaving only object construction in the Python loop below
+        points = np.empty(len(d_locs) + 2, dtype=object)
+        points[0] = o_loc
+        points[1:-1] = d_locs
+        points[-1] = o_loc
+        leg_distances = shapely.distance(points[:-1], points[1:]) * 1.4
+        leg_start, leg_end, stop_durations = _compute_schedule(
+            leg_distances, end_tm, EXPECTED_EUCLIDEAN_SPEEDS["freight"], 3600.0, 600.0
+        )
+
         # add stops to plan
         for k in range(len(d_locs)):
             if k == 0:
@@ -533,59 +770,50 @@ class TourPlanner:
                 previous_zone = d_zones[k - 1]
                 previous_loc = d_locs[k - 1]
 
-            start_tm = end_tm
-            trip_distance = model_distance(previous_loc, d_locs[k])
-            trip_duration = model_journey_time(trip_distance)
-            activity_duration = model_activity_time(trip_duration)
-            end_tm = end_tm + int(trip_duration / 60)
-
-            end_tm = self.add_tour_leg(
-                agent=agent,
-                k=k,
-                o_zone=previous_zone,
-                o_loc=previous_loc,
-                d_zone=d_zones[k],
-                d_loc=d_locs[k],
-                start_tm=start_tm,
-                end_tm=end_tm,
+            components.append(
+                self._build_tour_leg(
+                    k=k,
+                    o_zone=previous_zone,
+                    o_loc=previous_loc,
+                    d_zone=d_zones[k],
+                    d_loc=d_locs[k],
+                    start_tm=int(leg_start[k]),
+                    end_tm=int(leg_end[k]),
+                )
             )
+            end_tm = int(leg_end[k])
 
-            time_params = {"end_tm": end_tm, "stop_duration": activity_duration}
-            end_tm = self.add_tour_activity(
-                agent=agent,
+            time_params = {"end_tm": end_tm, "stop_duration": float(stop_durations[k])}
+            activity, end_tm = self._build_tour_activity(
                 k=k,
                 zone=d_zones[k],
                 loc=d_locs[k],
                 activity_type=self.d_activity,
                 time_params=time_params,
             )
+            components.append(activity)
         # returning to origin
 
-        start_tm = end_tm
-        trip_distance = model_distance(d_locs[len(d_locs) - 1], o_loc)
-        trip_duration = model_journey_time(trip_distance)
-        end_tm = end_tm + int(trip_duration / 60)
-
-        end_tm = self.add_tour_leg(
-            agent=agent,
-            k=k + 1,
-            o_zone=d_zones[-1],
-            o_loc=d_locs[-1],
-            d_zone=self.o_zone,
-            d_loc=o_loc,
-            start_tm=start_tm,
-            end_tm=end_tm,
+        components.append(
+            self._build_tour_leg(
+                k=k + 1,
+                o_zone=d_zones[-1],
+                o_loc=d_locs[-1],
+                d_zone=self.o_zone,
+                d_loc=o_loc,
+                start_tm=int(leg_start[-1]),
+                end_tm=int(leg_end[-1]),
+            )
         )
+        end_tm = int(leg_end[-1])
 
         time_params = {"start_tm": end_tm, "end_tm": END_OF_DAY}
-        end_tm = self.add_tour_activity(
-            agent=agent,
-            k=k,
-            zone=self.o_zone,
-            loc=o_loc,
-            activity_type="return_origin",
-            time_params=time_params,
+        activity, end_tm = self._build_tour_activity(
+            k=k, zone=self.o_zone, loc=o_loc, activity_type="return_origin", time_params=time_params
         )
+        components.append(activity)
+
+        agent.extend(components)
 
 
 class ValidateTourOD:
@@ -619,49 +847,23 @@ class ValidateTourOD:
             d_freq (str): destination frequency that is used to sample destination distributions.
         """
         # Create a dataframe to plot od trips and compare against facility density and flows density.
-        df_trips_o = (
-            trips[trips["origin activity"] == o_activity]
-            .groupby(["ozone"])
-            .agg({"pid": "count"})
-            .reset_index()
-        )
-        df_trips_o.rename(columns={"pid": "origin_trips"}, inplace=True)
-        df_trips_o.set_index("ozone", inplace=True)
-
-        df_trips_d = (
-            trips[trips["destination activity"] == d_activity]
-            .groupby(["dzone"])
-            .agg({"pid": "count"})
-            .reset_index()
-        )
-        df_trips_d.rename(columns={"pid": "destination_trips"}, inplace=True)
-        df_trips_d.set_index("dzone", inplace=True)
-
-        self.od_density = zone.copy()
-
-        # Merge in trips information
-        self.od_density = pd.merge(
-            self.od_density,
-            df_trips_o,
-            left_on=self.od_density.index,
-            right_on=df_trips_o.index,
-            how="left",
+        # Count trips with one value_counts pass per end of the trip,
+        # and attach every measure to the zone frame by index-aligned maps
+        # rather than a chain of merges.
+        o_counts = trips.loc[trips["origin activity"] == o_activity, "ozone"].value_counts()
+        d_counts = trips.loc[trips["destination activity"] == d_activity, "dzone"].value_counts()
+
+        o_density = o_dist.groupby(o_dist.index, sort=False)[o_freq].sum()
+        d_density = d_dist.groupby(d_dist.index, sort=False)[d_freq].sum()
+
+        self.od_density = zone.assign(
+            origin_trips=zone.index.map(o_counts),
+            destination_trips=zone.index.map(d_counts),
+            **{
+                f"{o_activity}_density": zone.index.map(o_density),
+                f"{d_activity}_density": zone.index.map(d_density),
+            },
         )
-        self.od_density = pd.merge(
-            self.od_density, df_trips_d, left_on="key_0", right_on=df_trips_d.index, how="left"
-        )
-
-        # Merge in density information
-        o_density = o_dist.reset_index()
-        o_density = o_density.groupby(o_dist.index).agg({o_freq: "sum"})
-        d_density = d_dist.reset_index()
-        d_density = d_density.groupby(d_dist.index).agg({d_freq: "sum"})
-
-        self.od_density[f"{o_activity}_density"] = self.od_density.key_0.map(o_density[o_freq])
-        self.od_density[f"{d_activity}_density"] = self.od_density.key_0.map(d_density[d_freq])
-
-        self.od_density.rename(columns={"key_0": zone.index.name}, inplace=True)
-        self.od_density.set_index(zone.index.name, inplace=True)
 
         # Add in features for analysis
         self.od_density = self.od_density.fillna(0)
@@ -698,6 +900,8 @@ class ValidateTourOD:
         Returns:
             plt.Figure:
         """
+        from matplotlib import pyplot as plt
+
         fig, ax = plt.subplots(1, 2, figsize=(20, 10))
 
         self.od_density.plot(density_metric, ax=ax[0], cmap=cmap)
@@ -728,6 +932,8 @@ class ValidateTourOD:
         Returns:
             plt.Figure:
         """
+        from matplotlib import pyplot as plt
+
         fig, ax = plt.subplots(1, 2, figsize=(15, 7))
 
         m1, b1 = np.polyfit(self.od_density[o_activity], self.od_density.origin_trip_density, 1)
@@ -768,6 +974,8 @@ class ValidateTourOD:
         Returns:
             plt.Figure:
         """
+        from matplotlib import pyplot as plt
+
         fig, ax = plt.subplots(1, 2, figsize=(20, 10))
 
         self.od_density.plot("origin_diff", ax=ax[0], cmap=cmap)
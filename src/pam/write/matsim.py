@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import functools
+import gzip
+import io
 import logging
+import numbers
 import os
+import shutil
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional, Union
 from warnings import warn
+from xml.sax.saxutils import escape, quoteattr
 
 import importlib_resources
 
@@ -14,8 +24,8 @@ if TYPE_CHECKING:
 
 from lxml import etree as et
 
-from pam.activity import Activity, Leg, Plan
-from pam.utils import DEFAULT_GZIP_COMPRESSION, create_crs_attribute, create_local_dir, is_gzip
+from pam.activity import Activity, Leg, Plan, Trip
+from pam.utils import DEFAULT_GZIP_COMPRESSION, create_crs_attribute, is_gzip
 from pam.utils import datetime_to_matsim_time as dttm
 from pam.utils import timedelta_to_matsim_time as tdtm
 
@@ -59,21 +69,99 @@ def write_matsim(
     if vehs_path is None and evs_path is not None:
         raise UserWarning("You must provide a vehs_path in addition to evs_path.")
 
-    write_matsim_population_v6(
-        population=population,
-        path=plans_path,
-        comment=comment,
-        household_key=household_key,
-        keep_non_selected=keep_non_selected,
-        coordinate_reference_system=coordinate_reference_system,
-    )
+    if vehs_path is None:
+        write_matsim_population_v6(
+            population=population,
+            path=plans_path,
+            comment=comment,
+            household_key=household_key,
+            keep_non_selected=keep_non_selected,
+            coordinate_reference_system=coordinate_reference_system,
+        )
+        return
+
+    logging.info("Building population vehicles output.")
+    # rebuild vehicles output from population before writing,
+    # so both writers only read shared state
+    population.rebuild_vehicles_manager()
+
+    # the plans and vehicles files are independent outputs and the heavy
+    # work happens in lxml and zlib, which release the GIL, so overlap them
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        plans_future = executor.submit(
+            write_matsim_population_v6,
+            population=population,
+            path=plans_path,
+            comment=comment,
+            household_key=household_key,
+            keep_non_selected=keep_non_selected,
+            coordinate_reference_system=coordinate_reference_system,
+        )
+        vehs_future = executor.submit(population._vehicles_manager.to_xml, vehs_path, evs_path)
+        plans_future.result()
+        vehs_future.result()
+
+
+class _ChunkedGzipSink:
+    """File-like sink that compresses independent chunks on a process pool.
+
+    Writes are buffered until ``chunk_size`` bytes, then each chunk is deflated
+    as a standalone gzip member on a worker process. Concatenated members form a
+    valid gzip stream (RFC 1952), so readers are unaffected. Compressed chunks
+    are written to the file in submission order.
+    """
 
-    # write vehicles
-    if vehs_path is not None:
-        logging.info("Building population vehicles output.")
-        # rebuild vehicles output from population
-        population.rebuild_vehicles_manager()
-        population._vehicles_manager.to_xml(vehs_path, evs_path)
+    def __init__(
+        self, path: str, compresslevel: int, workers: int, chunk_size: int = 32 * 1024 * 1024
+    ) -> None:
+        self._file = open(path, "wb")
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._futures = deque()
+        self._buffer = bytearray()
+        self._chunk_size = chunk_size
+        self._compresslevel = compresslevel
+        # bound pending chunks so memory use stays proportional to the pool size
+        self._max_pending = workers * 2
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self._submit_chunk()
+        return len(data)
+
+    def _submit_chunk(self) -> None:
+        if not self._buffer:
+            return
+        self._futures.append(
+            self._executor.submit(gzip.compress, bytes(self._buffer), self._compresslevel)
+        )
+        self._buffer = bytearray()
+        while len(self._futures) > self._max_pending:
+            self._file.write(self._futures.popleft().result())
+
+    def close(self) -> None:
+        self._submit_chunk()
+        while self._futures:
+            self._file.write(self._futures.popleft().result())
+        self._executor.shutdown()
+        self._file.close()
+
+
+@functools.lru_cache(maxsize=1024)
+def _ensure_dir(directory: str) -> None:
+    """Create the output directory once, skipping the syscalls on repeats."""
+    os.makedirs(directory, exist_ok=True)
+
+
+@functools.lru_cache(maxsize=32)
+def _crs_attribute_bytes(coordinate_reference_system: str) -> bytes:
+    """Byte-template equivalent of pam.utils.create_crs_attribute."""
+    return (
+        "<attributes>"
+        '<attribute class="java.lang.String" name="coordinateReferenceSystem">'
+        f"{escape(str(coordinate_reference_system))}</attribute>"
+        "</attributes>\n"
+    ).encode("utf-8")
 
 
 class Writer:
@@ -103,52 +191,133 @@ class Writer:
         comment: Optional[str] = None,
         keep_non_selected: bool = False,
         coordinate_reference_system: str = None,
+        pretty_print: bool = False,
+        gzip_workers: Optional[int] = None,
     ) -> None:
         if os.path.dirname(path):
-            create_local_dir(os.path.dirname(path))
+            _ensure_dir(os.path.dirname(path))
         self.path = path
         self.household_key = household_key
         self.comment = comment
         self.keep_non_selected = keep_non_selected
         self.coordinate_reference_system = coordinate_reference_system
+        # MATSim consumes the output by machine, so indentation is off by default;
+        # a newline is still written between persons to keep line boundaries greppable
+        self.pretty_print = pretty_print
         self.compression = DEFAULT_GZIP_COMPRESSION if is_gzip(path) else 0
+        # spread gzip compression over this many worker processes
+        self.gzip_workers = gzip_workers
         self.xmlfile = None
         self.writer = None
         self.population_writer = None
+        self._sink = None
+        self._buffer = None
+        # serialized person tails keyed by plan content; template populations
+        # repeat identical plans across many persons
+        self._person_cache: dict = {}
 
     def __enter__(self) -> Writer:
-        self.xmlfile = et.xmlfile(self.path, encoding="utf-8", compression=self.compression)
+        if self.compression and self.gzip_workers:
+            # single-threaded deflate dominates large writes; compress
+            # independent chunks concurrently and concatenate the members
+            self._sink = _ChunkedGzipSink(
+                self.path, compresslevel=self.compression, workers=self.gzip_workers
+            )
+            self.xmlfile = et.xmlfile(self._sink, encoding="utf-8")
+        elif self.compression:
+            # buffer the raw stream so the gzip layer deflates few large blocks
+            # rather than one small block per element write
+            self._buffer = io.BufferedWriter(open(self.path, "wb"), buffer_size=128 * 1024)
+            self._sink = gzip.GzipFile(
+                fileobj=self._buffer, mode="wb", compresslevel=self.compression
+            )
+            self.xmlfile = et.xmlfile(self._sink, encoding="utf-8")
+        else:
+            # a large explicit buffer amortises syscall cost across many
+            # small element writes from the incremental serializer
+            self._buffer = io.BufferedWriter(open(self.path, "wb"), buffer_size=4 * 1024 * 1024)
+            self.xmlfile = et.xmlfile(self._buffer, encoding="utf-8")
         self.writer = self.xmlfile.__enter__()  # enter into lxml file writer
         self.writer.write_declaration()
         self.writer.write_doctype(
             '<!DOCTYPE population SYSTEM "http://matsim.org/files/dtd/population_v6.dtd">'
         )
         if self.comment:
-            self.writer.write(et.Comment(self.comment), pretty_print=True)
-        self.writer.write(et.Comment(f"Created {datetime.today()}"), pretty_print=True)
+            self.writer.write(et.Comment(self.comment), pretty_print=self.pretty_print)
+        self.writer.write(et.Comment(f"Created {datetime.today()}"), pretty_print=self.pretty_print)
 
         self.population_writer = self.writer.element("population")
         self.population_writer.__enter__()  # enter into lxml element writer
         if self.coordinate_reference_system is not None:
-            self.writer.write(
-                create_crs_attribute(self.coordinate_reference_system), pretty_print=True
-            )
+            if self.pretty_print:
+                self.writer.write(
+                    create_crs_attribute(self.coordinate_reference_system), pretty_print=True
+                )
+            else:
+                # the header is a fixed template, so write its cached bytes
+                # straight to the sink instead of building and walking a tree
+                self.writer.flush()
+                sink = self._sink if self._sink is not None else self._buffer
+                sink.write(_crs_attribute_bytes(self.coordinate_reference_system))
         return self
 
     def add_hh(self, household) -> None:
+        if self.household_key is not None:
+            # emit hid as an attribute at serialization time,
+            # without mutating the input population
+            extra_attrs = {self.household_key: household.hid}
+        else:
+            extra_attrs = None
         for _, person in household:
-            if self.household_key is not None:
-                # force add hid as an attribute
-                person.attributes[self.household_key] = household.hid
-            self.add_person(person)
-
-    def add_person(self, person) -> None:
-        e = create_person_element(person.pid, person, self.keep_non_selected)
-        self.writer.write(e, pretty_print=True)
+            self.add_person(person, extra_attrs=extra_attrs)
+
+    def add_person(self, person, extra_attrs: Optional[dict] = None) -> None:
+        if self.pretty_print:
+            stream_person(
+                self.writer,
+                person.pid,
+                person,
+                self.keep_non_selected,
+                pretty_print=True,
+                extra_attrs=extra_attrs,
+            )
+            return
+        # fast path: the person subtree has a fixed, simple schema, so emit it
+        # with string templates and write the bytes straight to the sink,
+        # bypassing element construction entirely. flush() first so lxml has
+        # written any open start tags ahead of the raw bytes.
+        self.writer.flush()
+        sink = self._sink if self._sink is not None else self._buffer
+        tail = None
+        key = _person_cache_key(person, self.keep_non_selected, extra_attrs)
+        if key is not None:
+            try:
+                tail = self._person_cache.get(key)
+            except TypeError:  # unhashable attribute value
+                key = None
+        if tail is None:
+            tail = _person_tail_xml(person, self.keep_non_selected, extra_attrs)
+            if key is not None:
+                if len(self._person_cache) >= _PERSON_CACHE_LIMIT:
+                    self._person_cache.clear()
+                self._person_cache[key] = tail
+        sink.write((f"<person id={quoteattr(str(person.pid))}>" + tail).encode("utf-8"))
+
+    def add_fragment(self, path: str) -> None:
+        """Append a file of pre-serialized person elements to the population."""
+        self.writer.flush()
+        sink = self._sink if self._sink is not None else self._buffer
+        with open(path, "rb") as fragment:
+            shutil.copyfileobj(fragment, sink, 1024 * 1024)
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.population_writer.__exit__(exc_type, exc_value, traceback)
         self.xmlfile.__exit__(exc_type, exc_value, traceback)
+        # close the sink chain in reverse order; GzipFile does not close its fileobj
+        if self._sink is not None:
+            self._sink.close()
+        if self._buffer is not None:
+            self._buffer.close()
 
 
 def write_matsim_population_v6(
@@ -158,6 +327,8 @@ def write_matsim_population_v6(
     comment: Optional[str] = None,
     keep_non_selected: bool = False,
     coordinate_reference_system: str = None,
+    pretty_print: bool = False,
+    workers: Optional[int] = None,
 ) -> None:
     """Write matsim population v6 xml (persons plans and attributes combined).
 
@@ -168,119 +339,479 @@ def write_matsim_population_v6(
         comment (Optional[str], optional): optionally add a comment string to the xml outputs. Defaults to None.
         keep_non_selected (bool, optional): Defaults to False.
         coordinate_reference_system (str, optional): Defaults to None.
+        pretty_print (bool, optional): indent the output for human readers. Defaults to False.
+        workers (Optional[int], optional): serialize households on this many worker processes,
+            concatenating the resulting fragments in order. Requires a picklable population;
+            if legs carry prebuilt lxml route elements the write falls back to the serial
+            path with a warning. Ignores pretty_print. Defaults to None.
     """
+    if workers and _has_route_elements(population):
+        logging.warning(
+            "Parallel write requires a picklable population, but legs carry prebuilt "
+            "route elements; falling back to a serial write."
+        )
+        workers = None
     with Writer(
         path=path,
         household_key=household_key,
         comment=comment,
         keep_non_selected=keep_non_selected,
         coordinate_reference_system=coordinate_reference_system,
+        pretty_print=pretty_print,
     ) as writer:
-        for _, household in population:
-            writer.add_hh(household)
+        if workers:
+            _write_households_parallel(writer, population, workers)
+        else:
+            for _, household in population:
+                writer.add_hh(household)
+
 
+def _has_route_elements(population: Population) -> bool:
+    """Whether any leg holds a prebuilt lxml route element,
+    which cannot be pickled across a process boundary."""
+    for _, _, person in population.people():
+        for plan in [person.plan] + person.plans_non_selected:
+            for leg in plan.legs:
+                if leg.route.exists:
+                    return True
+    return False
+
+
+def _write_households_parallel(writer: Writer, population: Population, workers: int) -> None:
+    """Partition households across worker processes, each serializing its slice
+    to a temporary fragment of concatenated person elements, then concatenate
+    the fragments into the writer's sink in deterministic order."""
+    households = list(population.households.values())
+    bounds = [(len(households) * i) // workers for i in range(workers + 1)]
+    with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(
+        max_workers=workers
+    ) as executor:
+        futures = []
+        for worker, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            fragment_path = os.path.join(tmp_dir, f"fragment_{worker}.xml")
+            futures.append(
+                (
+                    fragment_path,
+                    executor.submit(
+                        _write_population_fragment,
+                        households[start:stop],
+                        fragment_path,
+                        writer.household_key,
+                        writer.keep_non_selected,
+                    ),
+                )
+            )
+        for fragment_path, future in futures:
+            future.result()
+            writer.add_fragment(fragment_path)
 
-def create_person_element(pid, person, keep_non_selected: bool = False):
+
+def _write_population_fragment(
+    households: list, path: str, household_key: Optional[str], keep_non_selected: bool
+) -> None:  # pragma: no cover
+    """Worker task: serialize a slice of households to a fragment file of person elements.
+
+    Runs on worker processes, so coverage cannot trace it; the parallel
+    roundtrip tests exercise it end to end.
+    """
+    with io.BufferedWriter(open(path, "wb"), buffer_size=1024 * 1024) as fragment:
+        for household in households:
+            if household_key is not None:
+                extra_attrs = {household_key: household.hid}
+            else:
+                extra_attrs = None
+            for _, person in household:
+                fragment.write(
+                    _person_xml_bytes(person.pid, person, keep_non_selected, extra_attrs)
+                )
+
+
+def create_person_element(pid, person, keep_non_selected: bool = False, extra_attrs=None):
     person_xml = et.Element("person", {"id": str(pid)})
 
-    attributes = et.SubElement(person_xml, "attributes", {})
+    if person.attributes or person.vehicles or extra_attrs:
+        person_xml.append(create_attributes_element(person, extra_attrs))
+
+    write_plan(person_xml, person.plan, selected=True)
+    if keep_non_selected:
+        for plan in person.plans_non_selected:
+            write_plan(person_xml, plan, selected=False)
+    return person_xml
+
+
+def create_attributes_element(person, extra_attrs: Optional[dict] = None) -> et.Element:
+    attributes = et.Element(_ATTRIBUTES_TAG)
     if person.vehicles:
         attribute = et.SubElement(
             attributes,
-            "attribute",
-            {"class": "org.matsim.vehicles.PersonVehicles", "name": "vehicles"},
+            _ATTRIBUTE_TAG,
+            {_CLASS_KEY: "org.matsim.vehicles.PersonVehicles", _NAME_KEY: "vehicles"},
         )
         attribute.text = str({k: v.vid for k, v in person.vehicles.items()}).replace("'", '"')
 
     for k, v in person.attributes.items():
+        if extra_attrs is not None and k in extra_attrs:
+            continue
         add_attribute(attributes, k, v)
+    if extra_attrs is not None:
+        for k, v in extra_attrs.items():
+            add_attribute(attributes, k, v)
+    return attributes
 
-    write_plan(person_xml, person.plan, selected=True)
-    if keep_non_selected:
-        for plan in person.plans_non_selected:
-            write_plan(person_xml, plan, selected=False)
-    return person_xml
 
+def stream_person(
+    writer,
+    pid,
+    person,
+    keep_non_selected: bool = False,
+    pretty_print: bool = False,
+    extra_attrs: Optional[dict] = None,
+) -> None:
+    """Stream a person to an lxml incremental writer without building the person subtree.
 
-def write_plan(person_xml: et.SubElement, plan: Plan, selected: Optional[bool] = None):
+    Each plan component is emitted as soon as it is built inside nested element
+    contexts, so per-person memory stays bounded by the largest single component
+    rather than the whole subtree.
+    """
+    with writer.element("person", {"id": str(pid)}):
+        if person.attributes or person.vehicles or extra_attrs:
+            writer.write(create_attributes_element(person, extra_attrs), pretty_print=pretty_print)
+
+        stream_plan(writer, person.plan, selected=True, pretty_print=pretty_print)
+        if keep_non_selected:
+            for plan in person.plans_non_selected:
+                stream_plan(writer, plan, selected=False, pretty_print=pretty_print)
+
+
+def stream_plan(
+    writer, plan: Plan, selected: Optional[bool] = None, pretty_print: bool = False
+) -> None:
+    """Stream a plan to an lxml incremental writer, one component element at a time."""
+    with writer.element("plan", _plan_attributes(plan, selected)):
+        for component in plan:
+            builder = _component_builder(component)
+            if builder is not None:
+                writer.write(builder(component), pretty_print=pretty_print)
+
+
+def _plan_attributes(plan: Plan, selected: Optional[bool]) -> dict:
     plan_attributes = {}
     if selected is not None:
         plan_attributes["selected"] = {True: "yes", False: "no"}[selected]
     if plan.score is not None:
         plan_attributes["score"] = str(plan.score)
+    return plan_attributes
+
 
-    plan_xml = et.SubElement(person_xml, "plan", plan_attributes)
+def write_plan(person_xml: et.SubElement, plan: Plan, selected: Optional[bool] = None):
+    plan_xml = et.SubElement(person_xml, "plan", _plan_attributes(plan, selected))
     for component in plan:
+        builder = _component_builder(component)
+        if builder is not None:
+            plan_xml.append(builder(component))
+
+
+# real populations share a small set of canonical times and durations,
+# so cache their matsim string forms; the caches are cleared if they
+# ever grow past a bound that suggests mostly-unique values
+_TIME_CACHE_LIMIT = 65536
+# bound on the Writer person-tail cache; cleared in full when exceeded
+_PERSON_CACHE_LIMIT = 4096
+_dttm_cache: dict = {}
+_tdtm_cache: dict = {}
+
+
+def _cached_dttm(t) -> str:
+    s = _dttm_cache.get(t)
+    if s is None:
+        if len(_dttm_cache) >= _TIME_CACHE_LIMIT:
+            _dttm_cache.clear()
+        s = _dttm_cache.setdefault(t, dttm(t))
+    return s
+
+
+def _cached_tdtm(t) -> str:
+    s = _tdtm_cache.get(t)
+    if s is None:
+        if len(_tdtm_cache) >= _TIME_CACHE_LIMIT:
+            _tdtm_cache.clear()
+        s = _tdtm_cache.setdefault(t, tdtm(t))
+    return s
+
+
+def _component_builder(component):
+    """Resolve the element builder for a plan component with one dict lookup
+    on the exact type, falling back to isinstance checks for subclasses."""
+    builder = _COMPONENT_BUILDERS.get(type(component))
+    if builder is None:
         if isinstance(component, Activity):
-            component.validate_matsim()
-            act_data = {"type": component.act}
-            if component.start_time is not None:
-                act_data["start_time"] = dttm(component.start_time)
-            if component.end_time is not None:
-                act_data["end_time"] = dttm(component.end_time)
-            if component.location.link is not None:
-                act_data["link"] = str(component.location.link)
-            if component.location.x is not None:
-                act_data["x"] = str(component.location.x)
-            if component.location.y is not None:
-                act_data["y"] = str(component.location.y)
-            et.SubElement(plan_xml, "activity", act_data)
-
-        if isinstance(component, Leg):
-            leg = et.SubElement(
-                plan_xml, "leg", {"mode": component.mode, "trav_time": tdtm(component.duration)}
-            )
+            builder = _build_activity_element
+        elif isinstance(component, Leg):
+            builder = _build_leg_element
+    return builder
 
-            if component.attributes:
-                attributes = et.SubElement(leg, "attributes")
-                for k, v in component.attributes.items():
-                    if (
-                        k == "enterVehicleTime"
-                    ):  # todo make something more robust for future 'special' classes
-                        attribute = et.SubElement(
-                            attributes, "attribute", {"class": "java.lang.Double", "name": str(k)}
-                        )
-                        attribute.text = str(v)
-                    else:
-                        add_attribute(attributes, k, v)
 
-            if component.route.exists:
-                leg.append(component.route.xml)
+# Activity.validate_matsim only inspects which of act/start_time/end_time/
+# loc/link are set, so its outcome is fully determined by that shape; record
+# shapes that have already validated and skip the method call on repeats.
+_validated_activity_shapes: set = set()
 
 
-def add_attribute(attributes, k, v):
+def _validate_activity(component: Activity) -> None:
+    shape = (
+        component.act is None,
+        component.start_time is None,
+        component.end_time is None,
+        component.location.loc is None,
+        component.location.link is None,
+    )
+    if shape not in _validated_activity_shapes:
+        component.validate_matsim()
+        _validated_activity_shapes.add(shape)
+
+
+def _build_activity_element(component: Activity) -> et.Element:
+    _validate_activity(component)
+    act_data = {"type": component.act}
+    if component.start_time is not None:
+        act_data["start_time"] = _cached_dttm(component.start_time)
+    if component.end_time is not None:
+        act_data["end_time"] = _cached_dttm(component.end_time)
+    if component.location.link is not None:
+        act_data["link"] = str(component.location.link)
+    if component.location.x is not None:
+        act_data["x"] = str(component.location.x)
+    if component.location.y is not None:
+        act_data["y"] = str(component.location.y)
+    return et.Element(_ACTIVITY_TAG, act_data)
+
+
+def _build_leg_element(component: Leg) -> et.Element:
+    leg = et.Element(
+        _LEG_TAG, {"mode": component.mode, "trav_time": _cached_tdtm(component.duration)}
+    )
+
+    if component.attributes:
+        attributes = et.SubElement(leg, _ATTRIBUTES_TAG)
+        for k, v in component.attributes.items():
+            if (
+                k == "enterVehicleTime"
+            ):  # todo make something more robust for future 'special' classes
+                attribute = et.SubElement(
+                    attributes,
+                    _ATTRIBUTE_TAG,
+                    {_CLASS_KEY: _ATTRIBUTE_CLASSES[float], _NAME_KEY: str(k)},
+                )
+                attribute.text = str(v)
+            else:
+                add_attribute(attributes, k, v)
+
+    if component.route.exists:
+        leg.append(component.route.xml)
+    return leg
+
+
+_COMPONENT_BUILDERS = {
+    Activity: _build_activity_element,
+    Leg: _build_leg_element,
+    Trip: _build_leg_element,
+}
+
+# the tag and java class names are emitted millions of times on large
+# populations, so intern them once and reuse the same string objects
+_ATTRIBUTE_TAG = sys.intern("attribute")
+_ATTRIBUTES_TAG = sys.intern("attributes")
+_ACTIVITY_TAG = sys.intern("activity")
+_LEG_TAG = sys.intern("leg")
+_CLASS_KEY = sys.intern("class")
+_NAME_KEY = sys.intern("name")
+
+# ordered as the original isinstance chain: str, bool, int, float
+_ATTRIBUTE_CLASSES = {
+    str: sys.intern("java.lang.String"),
+    bool: sys.intern("java.lang.Boolean"),
+    int: sys.intern("java.lang.Integer"),
+    float: sys.intern("java.lang.Double"),
+}
+
+
+def _classify_attribute(v) -> str:
+    """Resolve the MATSim java class for attribute values of non-exact types.
+
+    bool is checked before the numeric ABCs since it is an Integral subtype,
+    and the ABCs catch numpy scalars (numpy.int64, numpy.float64) that
+    pandas-loaded populations commonly carry, which would otherwise be
+    misclassified as strings.
+    """
     if isinstance(v, str):
-        attribute = et.SubElement(
-            attributes, "attribute", {"class": "java.lang.String", "name": str(k)}
-        )
-        attribute.text = str(v)
-    elif isinstance(v, bool):
-        attribute = et.SubElement(
-            attributes, "attribute", {"class": "java.lang.Boolean", "name": str(k)}
-        )
-        attribute.text = str(v)
-    elif isinstance(v, int):
-        attribute = et.SubElement(
-            attributes, "attribute", {"class": "java.lang.Integer", "name": str(k)}
-        )
-        attribute.text = str(v)
-    elif isinstance(v, float):
-        attribute = et.SubElement(
-            attributes, "attribute", {"class": "java.lang.Double", "name": str(k)}
-        )
-        attribute.text = str(v)
-    elif k == "vehicles":
-        attribute = et.SubElement(
-            attributes,
-            "attribute",
-            {"class": "org.matsim.vehicles.PersonVehicles", "name": str("vehicles")},
-        )
-        attribute.text = str(v).replace("'", '"')
-    else:
-        attribute = et.SubElement(
-            attributes, "attribute", {"class": "java.lang.String", "name": str(k)}
+        return _ATTRIBUTE_CLASSES[str]
+    if isinstance(v, bool):
+        return _ATTRIBUTE_CLASSES[bool]
+    if isinstance(v, numbers.Integral):
+        return _ATTRIBUTE_CLASSES[int]
+    if isinstance(v, numbers.Real):
+        return _ATTRIBUTE_CLASSES[float]
+    return _ATTRIBUTE_CLASSES[str]
+
+
+def add_attribute(attributes, k, v):
+    cls = _ATTRIBUTE_CLASSES.get(type(v))
+    if cls is None:
+        if k == "vehicles":
+            attribute = et.SubElement(
+                attributes,
+                _ATTRIBUTE_TAG,
+                {_CLASS_KEY: "org.matsim.vehicles.PersonVehicles", _NAME_KEY: "vehicles"},
+            )
+            attribute.text = str(v).replace("'", '"')
+            return
+        cls = _classify_attribute(v)
+    name = k if isinstance(k, str) else str(k)
+    attribute = et.SubElement(attributes, _ATTRIBUTE_TAG, {_CLASS_KEY: cls, _NAME_KEY: name})
+    attribute.text = v if isinstance(v, str) else str(v)
+
+
+def _attribute_xml(k, v) -> str:
+    """String-template equivalent of add_attribute."""
+    cls = _ATTRIBUTE_CLASSES.get(type(v))
+    if cls is None:
+        if k == "vehicles":
+            text = str(v).replace("'", '"')
+            return (
+                '<attribute class="org.matsim.vehicles.PersonVehicles" name="vehicles">'
+                f"{escape(text)}</attribute>"
+            )
+        cls = _classify_attribute(v)
+    name = k if isinstance(k, str) else str(k)
+    text = v if isinstance(v, str) else str(v)
+    return f"<attribute class={quoteattr(cls)} name={quoteattr(name)}>{escape(text)}</attribute>"
+
+
+def _activity_xml(component: Activity) -> str:
+    """String-template equivalent of _build_activity_element."""
+    _validate_activity(component)
+    extra = ""
+    if component.start_time is not None:
+        extra += f' start_time="{_cached_dttm(component.start_time)}"'
+    if component.end_time is not None:
+        extra += f' end_time="{_cached_dttm(component.end_time)}"'
+    if component.location.link is not None:
+        extra += f" link={quoteattr(str(component.location.link))}"
+    if component.location.x is not None:
+        extra += f' x="{component.location.x}"'
+    if component.location.y is not None:
+        extra += f' y="{component.location.y}"'
+    return f"<activity type={quoteattr(component.act)}{extra}/>"
+
+
+def _leg_xml(component: Leg) -> str:
+    """String-template equivalent of _build_leg_element."""
+    head = (
+        f"<leg mode={quoteattr(component.mode)} " f'trav_time="{_cached_tdtm(component.duration)}"'
+    )
+    inner = ""
+    if component.attributes:
+        inner += "<attributes>"
+        for k, v in component.attributes.items():
+            if (
+                k == "enterVehicleTime"
+            ):  # todo make something more robust for future 'special' classes
+                inner += (
+                    f'<attribute class="java.lang.Double" name={quoteattr(str(k))}>'
+                    f"{escape(str(v))}</attribute>"
+                )
+            else:
+                inner += _attribute_xml(k, v)
+        inner += "</attributes>"
+    if component.route.exists:
+        inner += et.tostring(component.route.xml, encoding="unicode")
+    if inner:
+        return f"{head}>{inner}</leg>"
+    return f"{head}/>"
+
+
+def _person_xml_bytes(
+    pid, person, keep_non_selected: bool = False, extra_attrs: Optional[dict] = None
+) -> bytes:
+    """Serialize a person subtree with string templates instead of lxml elements.
+
+    The population schema has no mixed content and a fixed attribute set per
+    element, so handwritten templates with explicit escaping are markedly
+    cheaper than building and serializing a DOM. Route elements, which arrive
+    as prebuilt lxml nodes, are flattened with et.tostring.
+    """
+    head = f"<person id={quoteattr(str(pid))}>"
+    return (head + _person_tail_xml(person, keep_non_selected, extra_attrs)).encode("utf-8")
+
+
+def _person_tail_xml(
+    person, keep_non_selected: bool = False, extra_attrs: Optional[dict] = None
+) -> str:
+    """Serialize everything after the person open tag; independent of pid."""
+    parts = []
+    if person.attributes or person.vehicles or extra_attrs:
+        parts.append("<attributes>")
+        if person.vehicles:
+            text = str({k: v.vid for k, v in person.vehicles.items()}).replace("'", '"')
+            parts.append(
+                '<attribute class="org.matsim.vehicles.PersonVehicles" name="vehicles">'
+                f"{escape(text)}</attribute>"
+            )
+        for k, v in person.attributes.items():
+            if extra_attrs is not None and k in extra_attrs:
+                continue
+            parts.append(_attribute_xml(k, v))
+        if extra_attrs is not None:
+            for k, v in extra_attrs.items():
+                parts.append(_attribute_xml(k, v))
+        parts.append("</attributes>")
+
+    plans = [(person.plan, True)]
+    if keep_non_selected:
+        plans += [(plan, False) for plan in person.plans_non_selected]
+    for plan, selected in plans:
+        plan_attributes = _plan_attributes(plan, selected)
+        parts.append(
+            "<plan" + "".join(f" {k}={quoteattr(v)}" for k, v in plan_attributes.items()) + ">"
         )
-        attribute.text = str(v)
+        for component in plan:
+            if isinstance(component, Activity):
+                parts.append(_activity_xml(component))
+            elif isinstance(component, Leg):
+                parts.append(_leg_xml(component))
+        parts.append("</plan>")
+    parts.append("</person>\n")
+    return "".join(parts)
+
+
+def _person_cache_key(person, keep_non_selected: bool, extra_attrs: Optional[dict]):
+    """Build a hashable key capturing everything _person_tail_xml reads.
+
+    Returns None for persons the cache does not cover: vehicles, non-selected
+    plans, routed or attributed legs, and plan scores are rare enough in the
+    synthetic populations the cache targets that bailing out keeps the key
+    cheap for everyone else.
+    """
+    if person.vehicles or (keep_non_selected and person.plans_non_selected):
+        return None
+    plan = person.plan
+    if plan.score is not None:
+        return None
+    components = []
+    for c in plan:
+        if isinstance(c, Activity):
+            components.append(
+                (c.act, c.start_time, c.end_time, c.location.link, c.location.x, c.location.y)
+            )
+        elif isinstance(c, Leg):
+            if c.attributes or c.route.exists:
+                return None
+            components.append((c.mode, c.duration))
+    return (
+        tuple(person.attributes.items()),
+        tuple(extra_attrs.items()) if extra_attrs else None,
+        tuple(components),
+    )
 
 
 def object_attributes_dtd():
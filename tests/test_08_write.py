@@ -1,3 +1,4 @@
+import gzip
 import os
 from copy import deepcopy
 from datetime import datetime
@@ -12,7 +13,9 @@ from pam.core import Household, Person, Population
 from pam.read import read_matsim
 from pam.utils import minutes_to_datetime as mtdt
 from pam.variables import END_OF_DAY
+from pam.vehicles import Vehicle
 from pam.write import Writer, write_matsim, write_matsim_population_v6, write_od_matrices
+from pam.write.matsim import _ChunkedGzipSink, _person_xml_bytes, create_person_element
 from shapely.geometry import Point
 
 
@@ -133,6 +136,189 @@ def test_write_plans_xml_gzip(tmp_path, population_heh):
     assert os.path.exists(expected_file)
 
 
+def test_write_plans_xml_parallel_workers_roundtrip(tmp_path, population_heh):
+    location = str(tmp_path / "test.xml")
+    write_matsim_population_v6(population=population_heh, path=location, workers=2)
+    xml_obj = lxml.etree.parse(location)
+    dtd = write.population_v6_dtd()
+    assert dtd.validate(xml_obj), dtd.error_log.filter_from_errors()
+    duplicate = read_matsim(location, household_key="hid")
+    assert duplicate == population_heh
+
+
+def test_write_plans_xml_parallel_workers_falls_back_with_routes(tmp_path, test_trips_pathv12):
+    population = read_matsim(test_trips_pathv12, version=12)
+    location = str(tmp_path / "test.xml")
+    # legs carry prebuilt lxml route elements, which cannot be pickled;
+    # the write should fall back to the serial path rather than fail
+    write_matsim_population_v6(population=population, path=location, workers=2)
+    duplicate = read_matsim(location, leg_route=False)
+    assert len(duplicate) == len(population)
+
+
+def test_write_plans_xml_pretty_print_roundtrip(tmp_path, population_heh):
+    location = str(tmp_path / "test.xml")
+    write_matsim_population_v6(population=population_heh, path=location, pretty_print=True)
+    xml_obj = lxml.etree.parse(location)
+    dtd = write.population_v6_dtd()
+    assert dtd.validate(xml_obj), dtd.error_log.filter_from_errors()
+    duplicate = read_matsim(location, household_key="hid")
+    assert duplicate == population_heh
+
+
+def test_write_plans_xml_pretty_print_matches_default(tmp_path):
+    test_tripsv12_path = pytest.test_data_dir / "test_matsim_plansv12.xml"
+    population = read_matsim(test_tripsv12_path, version=12, keep_non_selected=True)
+    pretty_location = str(tmp_path / "pretty.xml")
+    default_location = str(tmp_path / "default.xml")
+    write_matsim_population_v6(
+        population=population,
+        path=pretty_location,
+        household_key=None,
+        keep_non_selected=True,
+        pretty_print=True,
+    )
+    write_matsim_population_v6(
+        population=population, path=default_location, household_key=None, keep_non_selected=True
+    )
+    pretty = read_matsim(pretty_location, version=12, keep_non_selected=True)
+    default = read_matsim(default_location, version=12, keep_non_selected=True)
+    assert pretty == default
+    assert pretty == population
+
+
+def test_writer_gzip_workers_roundtrip(tmp_path, population_heh):
+    location = str(tmp_path / "test.xml.gz")
+    with Writer(location, gzip_workers=2) as writer:
+        for _, household in population_heh:
+            writer.add_hh(household)
+    duplicate = read_matsim(location, household_key="hid")
+    assert duplicate == population_heh
+
+
+def test_write_matsim_legacy_params(tmp_path, population_heh):
+    location = str(tmp_path / "test.xml")
+    with pytest.warns(UserWarning, match="no longer supported"):
+        write_matsim(population=population_heh, plans_path=location, version=12)
+    write_matsim(population=population_heh, plans_path=location, attributes_path=location)
+    with pytest.raises(UserWarning, match="vehs_path"):
+        write_matsim(
+            population=population_heh, plans_path=location, evs_path=str(tmp_path / "evs.xml")
+        )
+
+
+def test_chunked_gzip_sink_concatenates_small_chunks(tmp_path):
+    path = str(tmp_path / "test.xml.gz")
+    sink = _ChunkedGzipSink(path, compresslevel=6, workers=2, chunk_size=16)
+    payload = b"<person/>" * 10
+    for _ in range(20):
+        sink.write(payload)
+    sink.close()
+    with gzip.open(path) as f:
+        assert f.read() == payload * 20
+
+
+def test_writer_crs_attribute_written_on_both_paths(tmp_path, population_heh):
+    for pretty_print in (False, True):
+        location = str(tmp_path / f"test_{pretty_print}.xml")
+        write_matsim_population_v6(
+            population=population_heh,
+            path=location,
+            coordinate_reference_system="EPSG:27700",
+            pretty_print=pretty_print,
+        )
+        xml_obj = lxml.etree.parse(location)
+        dtd = write.population_v6_dtd()
+        assert dtd.validate(xml_obj), dtd.error_log.filter_from_errors()
+        with open(location) as f:
+            txt = f.read()
+        assert 'name="coordinateReferenceSystem">EPSG:27700</attribute>' in txt
+
+
+def make_person(attributes, leg_attributes=None, vehicles=None):
+    person = Person("a", attributes=attributes, vehicles=vehicles)
+    person.add(
+        Activity(
+            act="home",
+            loc=Point((0, 0)),
+            start_time=datetime(1900, 1, 1, 0, 0, 0),
+            end_time=datetime(1900, 1, 1, 8, 0, 0),
+        )
+    )
+    person.add(
+        Leg(
+            mode="car",
+            start_loc=Point((0, 0)),
+            end_loc=Point((0, 1000)),
+            start_time=datetime(1900, 1, 1, 8, 0, 0),
+            end_time=datetime(1900, 1, 1, 9, 0, 0),
+            attributes=leg_attributes or {},
+        )
+    )
+    person.add(
+        Activity(
+            act="work",
+            loc=Point((0, 1000)),
+            start_time=datetime(1900, 1, 1, 9, 0, 0),
+            end_time=END_OF_DAY,
+        )
+    )
+    return person
+
+
+def test_writer_unhashable_attribute_not_cached(tmp_path):
+    path = str(tmp_path / "test.xml")
+    with Writer(path) as writer:
+        writer.add_person(make_person({"modes": ["car", "bike"]}))
+    xml_obj = lxml.etree.parse(path)
+    dtd = write.population_v6_dtd()
+    assert dtd.validate(xml_obj), dtd.error_log.filter_from_errors()
+    with open(path) as f:
+        assert "name=\"modes\">['car', 'bike']</attribute>" in f.read()
+
+
+def test_writer_leg_attributes_written(tmp_path):
+    path = str(tmp_path / "test.xml")
+    with Writer(path) as writer:
+        writer.add_person(make_person({"1": "1"}, leg_attributes={"enterVehicleTime": 28800.0}))
+    with open(path) as f:
+        txt = f.read()
+    assert 'class="java.lang.Double" name="enterVehicleTime">28800.0</attribute>' in txt
+
+
+def test_writer_person_cache_cleared_at_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr("pam.write.matsim._PERSON_CACHE_LIMIT", 1)
+    path = str(tmp_path / "test.xml")
+    with Writer(path) as writer:
+        writer.add_person(make_person({"1": "1"}))
+        writer.add_person(make_person({"1": "2"}))
+        writer.add_person(make_person({"1": "3"}))
+    xml_obj = lxml.etree.parse(path)
+    dtd = write.population_v6_dtd()
+    assert dtd.validate(xml_obj), dtd.error_log.filter_from_errors()
+
+
+def test_person_xml_bytes_matches_writer_output(tmp_path):
+    person = make_person({"1": "1"})
+    path = str(tmp_path / "test.xml")
+    with Writer(path) as writer:
+        writer.add_person(person)
+    with open(path) as f:
+        assert _person_xml_bytes(person.pid, person).decode() in f.read()
+
+
+def test_create_person_element_with_vehicles_and_leg_attributes():
+    person = make_person(
+        {"1": "1"},
+        leg_attributes={"enterVehicleTime": 28800.0},
+        vehicles={"car": Vehicle("a", "car")},
+    )
+    person_xml = create_person_element("a", person)
+    txt = lxml.etree.tostring(person_xml).decode()
+    assert 'class="org.matsim.vehicles.PersonVehicles" name="vehicles">{"car": "a"}' in txt
+    assert 'class="java.lang.Double" name="enterVehicleTime">28800.0</attribute>' in txt
+
+
 def test_write_matsim_xml(tmp_path, population_heh):
     location = str(tmp_path / "test.xml")
     write_matsim(population=population_heh, plans_path=location, comment="test")
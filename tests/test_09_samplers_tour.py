@@ -1,6 +1,9 @@
 # %% import packages
 
+import random
+
 import geopandas as gp
+import numpy as np
 import pandas as pd
 import pytest
 from matplotlib.figure import Figure
@@ -138,6 +141,12 @@ def test_model_distance_value():
     assert tour.model_distance(Point((0, 0)), Point((3, 4)), scale=1) == 5
 
 
+def test_model_distances_values():
+    o_loc = Point((0, 0))
+    destinations = [Point((3, 4)), Point((0, 5))]
+    np.testing.assert_array_equal(tour.model_distances(o_loc, destinations, scale=1), [5, 5])
+
+
 def test_model_journey_time_value():
     assert tour.model_journey_time(1000, 10) == 100
     assert tour.model_journey_time(50000, 40000 / 3600) == 4500
@@ -207,6 +216,20 @@ def test_frequency_sampler_type():
     assert isinstance(sampler.sample(), int)
 
 
+def test_frequency_sampler_zero_weights_raises():
+    sampler = tour.FrequencySampler(dist=["a", "b"], freq=[0, 0])
+    with pytest.raises(ValueError, match="Total of weights must be greater than zero"):
+        sampler.sample()
+
+
+def test_frequency_sampler_samples_reproducible_with_seed():
+    random.seed(10)
+    first = tour.FrequencySampler(dist=["a", "b", "c"], freq=[1, 2, 3]).samples(n=10)
+    random.seed(10)
+    second = tour.FrequencySampler(dist=["a", "b", "c"], freq=[1, 2, 3]).samples(n=10)
+    assert first == second
+
+
 def test_facility_density_missing_activity(depot_density, delivery_density):
     assert len(depot_density.density) > 0
     assert len(delivery_density.density) > 0
@@ -357,8 +380,10 @@ def d_facility_sampling(agent_plan_no_threshold):
     o_loc = agent_plan_no_threshold.facility_sampler.sample(
         agent_plan_no_threshold.o_zone, agent_plan_no_threshold.o_activity
     )
-    d_seq = tour.TourPlanner.sample_destinations(agent_plan_no_threshold, o_loc)
-    return o_loc, d_seq
+    d_zones, d_facilities, distances = tour.TourPlanner.sample_destinations(
+        agent_plan_no_threshold, o_loc
+    )
+    return o_loc, d_facilities
 
 
 @pytest.fixture
@@ -388,33 +413,30 @@ def od_density(trips, zones_gdf, depot_density, delivery_density):
 
 
 def test_unique_stops(d_facility_sampling):
-    o_loc, d_seq = d_facility_sampling
+    o_loc, d_facilities = d_facility_sampling
 
-    # test for duplicate delivery locations in d_seq
+    # test for duplicate delivery locations in d_facilities
     deliveries = set()
-    for d in d_seq:
-        d_point = d["destination_facility"]
-        assert d_point not in deliveries, "Duplicate point found in d_seq"
+    for d_point in d_facilities:
+        assert d_point not in deliveries, "Duplicate point found in d_facilities"
         deliveries.add(d_point)
 
 
 def test_origin_not_in_stops(d_facility_sampling):
-    o_loc, d_seq = d_facility_sampling
+    o_loc, d_facilities = d_facility_sampling
 
-    # test for duplicate delivery locations in d_seq
-    deliveries = set()
-    for d in d_seq:
-        d_point = d["destination_facility"]
-        deliveries.add(d_point)
+    deliveries = set(d_facilities)
 
-    # test if o_loc is in d_seq
+    # test if o_loc is in d_facilities
     assert o_loc not in deliveries, "o_loc has been sampled as a delivery location"
 
 
 def test_distance_matrix_is_complete(agent_plan_no_threshold, d_facility_sampling):
-    o_loc, d_seq = d_facility_sampling
+    o_loc, d_facilities = d_facility_sampling
 
-    dist_matrix = tour.TourPlanner.create_distance_matrix(agent_plan_no_threshold, o_loc, d_seq)
+    dist_matrix = tour.TourPlanner.create_distance_matrix(
+        agent_plan_no_threshold, o_loc, d_facilities
+    )
     # Check for zero distances between different points
     for i in range(dist_matrix.shape[0]):
         for j in range(dist_matrix.shape[1]):
@@ -430,6 +452,41 @@ def test_sequence_stops_length(sequenced_stops):
     assert len(d_locs) == 2
 
 
+def test_tour_planner_sampled_zones_within_threshold(agent_plan, df_od):
+    sampled = agent_plan._sample_d_zones(20)
+    sampled.append(agent_plan.d_zone_sample_choice())
+
+    for d_zone in sampled:
+        assert df_od.loc[agent_plan.o_zone, d_zone] <= agent_plan.threshold_value
+
+
+def test_tour_planner_empty_threshold_warns_and_returns_none(
+    hour_sampler, minute_sampler, delivery_density, df_od, facility_sampler
+):
+    # no delivery zone lies within 2000 of zone 2, so the reduction is empty
+    agent_plan = tour.TourPlanner(
+        stops=2,
+        hour=hour_sampler.sample(),
+        minute=minute_sampler.sample(),
+        o_zone=2,
+        d_dist=delivery_density,
+        d_freq="density",
+        threshold_matrix=df_od,
+        threshold_value=2000,
+        facility_sampler=facility_sampler,
+        activity_params={"o_activity": "depot", "d_activity": "delivery"},
+    )
+
+    with pytest.warns(
+        UserWarning, match="No destinations within this threshold value, change threshold"
+    ):
+        assert agent_plan.d_zone_sample_choice() is None
+    with pytest.warns(
+        UserWarning, match="No destinations within this threshold value, change threshold"
+    ):
+        assert agent_plan._sample_d_zones(2) == [None, None]
+
+
 def test_activity_endtm_depot(agent, agent_plan_no_threshold, hour_sampler, minute_sampler, o_zone):
     o_loc = Point(2000, 2000)
     time_params = {"hour": hour_sampler.sample(), "minute": minute_sampler.sample()}
@@ -453,6 +510,31 @@ def test_activity_endtm_notdepot(
     assert end_tm == (time_params["end_tm"] + int(time_params["stop_duration"] / 60))
 
 
+def test_add_tour_leg_end_time_and_mode(agent, agent_plan_no_threshold, o_zone):
+    o_loc = Point(2000, 2000)
+    agent_plan_no_threshold.add_tour_activity(
+        agent=agent,
+        k=0,
+        zone=o_zone,
+        loc=o_loc,
+        activity_type="depot",
+        time_params={"hour": 1, "minute": 0},
+    )
+    end_tm = agent_plan_no_threshold.add_tour_leg(
+        agent=agent,
+        k=0,
+        o_zone=o_zone,
+        o_loc=o_loc,
+        d_zone=1,
+        d_loc=Point(0, 2000),
+        start_tm=60,
+        end_tm=90,
+    )
+
+    assert end_tm == 90
+    assert agent.plan.day[-1].mode == "car"
+
+
 def test_activity_endtm_returnorigin(agent, agent_plan_no_threshold):
     o_loc = Point(2000, 2000)
     time_params = {"start_tm": 0, "end_tm": END_OF_DAY}
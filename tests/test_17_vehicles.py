@@ -430,7 +430,15 @@ def test_write_vehs_into_population(
     plans_path = tmp_path / "plans.xml"
     vehs_path = tmp_path / "vehs.xml"
     evs_path = tmp_path / "evs.xml"
-    write_matsim(population, plans_path=plans_path, vehs_path=vehs_path, evs_path=evs_path)
+    # the writer no longer mutates the population with a hid attribute,
+    # so skip injecting one to keep the roundtrip comparable
+    write_matsim(
+        population,
+        plans_path=plans_path,
+        vehs_path=vehs_path,
+        evs_path=evs_path,
+        household_key=None,
+    )
     duplicate = read_matsim(
         plans_path=plans_path, all_vehicles_path=vehs_path, electric_vehicles_path=evs_path
     )
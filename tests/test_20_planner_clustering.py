@@ -1,9 +1,13 @@
+from copy import deepcopy
+
 import numpy as np
 import pytest
 from pam.planner import clustering
 
 
-@pytest.fixture
+# module-scoped so the distance matrix and fit are computed once for all
+# read-only tests; tests that refit build their own instance below
+@pytest.fixture(scope="module")
 def clusters(population_no_args):
     clusters = clustering.PlanClusters(population_no_args)
     n_clusters = 2
@@ -33,6 +37,23 @@ def test_distance_matrix_is_summetrical():
     np.testing.assert_array_almost_equal(dist_matrix.T, dist_matrix)
 
 
+def test_myers_backend_matches_rapidfuzz():
+    sequences = ["AAB", "ABB", "BBBB", "A", ""]
+    dist_rapidfuzz = clustering.calc_levenshtein_matrix(x=sequences, y=sequences)
+    dist_myers = clustering.calc_levenshtein_matrix(x=sequences, y=sequences, backend="myers")
+    np.testing.assert_array_almost_equal(dist_rapidfuzz, dist_myers)
+
+
+def test_memmap_distances_match_in_memory(population_no_args, tmp_path):
+    clusters = clustering.PlanClusters(population_no_args)
+    mmap_clusters = clustering.PlanClusters(
+        population_no_args, mmap_path=str(tmp_path / "distances.dat")
+    )
+    np.testing.assert_array_almost_equal(clusters.distances, mmap_clusters.distances)
+    mmap_clusters.fit(n_clusters=2)
+    assert set(mmap_clusters.model.labels_) == set([0, 1])
+
+
 def test_clustering_create_model(population_no_args):
     clusters = clustering.PlanClusters(population_no_args)
     n_clusters = 2
@@ -41,6 +62,15 @@ def test_clustering_create_model(population_no_args):
     assert set(clusters.model.labels_) == set([0, 1])
 
 
+def test_histogram_embedding_fits_kmeans(population_no_args):
+    clusters = clustering.PlanClusters(population_no_args, embedding="histogram")
+    clusters.fit(n_clusters=2)
+    assert set(clusters.model.labels_) == set([0, 1])
+
+    with pytest.raises(ValueError):
+        clustering.PlanClusters(population_no_args, embedding="invalid_embedding")
+
+
 def test_closest_matches_return_different_plan(population_no_args):
     clusters = clustering.PlanClusters(population_no_args)
     plan = population_no_args["chris"]["chris"].plan
@@ -62,6 +92,47 @@ def test_closest_matches_are_ordered_by_distance(population_no_args):
         dist = dist_match
 
 
+def test_condensed_row_matches_square_matrix_row(population_no_args):
+    clusters = clustering.PlanClusters(population_no_args)
+    square = clustering.squareform(clusters.distances_condensed)
+    n = len(clusters.plans)
+    for idx in [0, n // 2, n - 1]:
+        expected = square[idx].copy()
+        expected[idx] = np.inf
+        np.testing.assert_array_almost_equal(clusters._condensed_row(idx), expected)
+
+
+def test_distances_no_diagonal_matches_square_with_inf_diagonal(population_no_args):
+    clusters = clustering.PlanClusters(population_no_args)
+    expected = clusters.distances.copy()
+    np.fill_diagonal(expected, np.inf)
+    np.testing.assert_array_equal(clusters.distances_no_diagonal, expected)
+
+
+def test_closest_matches_of_equal_foreign_plan_match_held_plan(population_no_args):
+    clusters = clustering.PlanClusters(population_no_args)
+    held = population_no_args["chris"]["chris"].plan
+    foreign = deepcopy(held)
+    assert foreign is not held
+    assert clusters.get_closest_matches(foreign, 3) == clusters.get_closest_matches(held, 3)
+
+
+def test_closest_matches_of_unknown_plan_are_ordered_by_distance(population_no_args):
+    clusters = clustering.PlanClusters(population_no_args)
+    foreign = deepcopy(population_no_args["chris"]["chris"].plan)
+    for component in foreign.day:
+        if getattr(component, "act", None) == "work":
+            component.act = "home"
+    with pytest.raises(ValueError):
+        clusters.plans.index(foreign)
+    closest_plans = clusters.get_closest_matches(foreign, 3)
+    encode = clusters.plans_encoder.plan_encoder.encode
+    distances = [
+        clustering._levenshtein_distance(encode(foreign), encode(plan)) for plan in closest_plans
+    ]
+    assert distances == sorted(distances)
+
+
 def test_cluster_plans_match_cluster_sizes(clusters):
     cluster_sizes = clusters.get_cluster_sizes()
     for cluster, size in cluster_sizes.items():
@@ -84,10 +155,12 @@ def test_clustering_plot_calls_function(clusters, mocker):
     clustering.plot_activity_breakdown_area_tiles.assert_called_once()
 
 
-def test_clustering_method_calls_correct_model(clusters, mocker):
-    mocker.patch.object(clustering, "AgglomerativeClustering")
+def test_clustering_method_calls_correct_model(population_no_args, mocker):
+    clusters = clustering.PlanClusters(population_no_args)
+    mocker.patch.object(clustering, "fastcluster")
+    mocker.patch.object(clustering, "hierarchy")
     clusters.fit(n_clusters=2, clustering_method="agglomerative")
-    clustering.AgglomerativeClustering.assert_called_once()
+    clustering.fastcluster.linkage.assert_called_once()
 
     mocker.patch.object(clustering, "SpectralClustering")
     clusters.fit(n_clusters=2, clustering_method="spectral")
@@ -97,7 +170,8 @@ def test_clustering_method_calls_correct_model(clusters, mocker):
         clusters.fit(n_clusters=2, clustering_method="invalid_method")
 
 
-def test_clustering_method_uses_correct_metric_matrix(clusters):
+def test_clustering_method_uses_correct_metric_matrix(population_no_args):
+    clusters = clustering.PlanClusters(population_no_args)
     clusters.fit(n_clusters=2, clustering_method="agglomerative")
     clusters.model.metric_matrix_ = clusters.distances
 